@@ -60,9 +60,9 @@ author = 'Anand S'
 # built documents.
 #
 # The short X.Y version.
-version = '1.0.0'
+version = '2.0.0'
 # The full version, including alpha/beta/rc tags.
-release = '1.0.0'
+release = '2.0.0'
 
 # The language for content autogenerated by Sphinx. Refer to documentation
 # for a list of supported languages.
@@ -34,4 +34,4 @@ logger = logging.getLogger('mandelbrot')
 
 if __name__ == "__main__":
     # NOTE: The name argument to the constructor HAS to match the string used as `var_name` for recording in `simulation.py`
-    GeneralImagePlotter('divtime', plot_frequency=1).start()
+    GeneralImagePlotter('divtime').start()
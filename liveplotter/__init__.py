@@ -19,3 +19,14 @@
 
 PORT = 5155
 SENTINEL = 'SENTINEL'
+
+
+def endpoint(address, host='localhost'):
+    """
+    :param address: Either a port number, or a full ZMQ endpoint such as `'tcp://vizhost:5155'` or `'ipc:///tmp/plots'`
+    :param str host: The host (or interface, e.g. `'*'` for binding to all) used if `address` is a port number
+    :return: The ZMQ endpoint
+    """
+    if isinstance(address, int):
+        return "tcp://%s:%d" % (host, address)
+    return address
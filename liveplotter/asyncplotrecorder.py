@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+# This file is part of live-plotter.
+#
+# live-plotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# live-plotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with live-plotter.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For more information see: https://github.com/anandtrex/live-plotter
+
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import asyncio
+import logging
+
+import zmq
+import zmq.asyncio
+
+from liveplotter import PORT, SENTINEL, endpoint
+from liveplotter import messages
+
+rlogger = logging.getLogger('liveplotter.asyncplotrecorder')
+
+
+class AsyncPlotRecorder(object):
+    """
+    This is a ZMQ publisher for use from within an asyncio event loop. It has the same interface as
+    :class:`~liveplotter.plotrecorder.PlotRecorder`, except that the sending methods never block the event loop.
+
+    **NOTE:** This class has to be created from within the event loop it is used in (e.g. inside a coroutine).
+
+    :param port: The port number to publish data (and subscribe to data) on all interfaces, or a full ZMQ endpoint,
+     e.g. `'tcp://vizhost:5155'` together with `bind=False` to send to a plotter on another host
+    :param bool bind: Whether to bind to the endpoint (the default) and let the plotters connect, or to connect to a
+     plotter (or proxy) that binds instead
+    :param compression: A :class:`~liveplotter.messages.Compression` to compress large values, or a dictionary
+     mapping variable names to their :class:`~liveplotter.messages.Compression` (the key None gives the default).
+     Values are not compressed by default.
+    :param context: An optional :class:`zmq.asyncio.Context`. A new one is created if not given.
+    :param float schema_interval: How often (in seconds) the variable names of :meth:`.record_many` are sent again for
+     plotters that start later
+    """
+
+    def __init__(self, port=PORT, context=None, schema_interval=1., bind=True, compression=None):
+        context = context or zmq.asyncio.Context.instance()
+        self.port = port
+        self.compression = compression
+        self.socket = context.socket(zmq.PUB)
+        if bind:
+            self.socket.bind(endpoint(port, '*'))
+            rlogger.info("Listening on %s", endpoint(port, '*'))
+        else:
+            self.socket.connect(endpoint(port))
+            rlogger.info("Connected to %s", endpoint(port))
+        # Sent with every message, so that subscribers can tell the recorders apart
+        self.id = messages.new_recorder_id()
+        self.rows = messages.RowEncoder(self.id, schema_interval)
+        self._pending = set()
+
+    async def record(self, var_name, var_value):
+        """
+        Coroutine that records a variable with name `var_name` and value `var_value`. See
+        :meth:`.PlotRecorder.record`.
+
+        :param var_name: Name of variable to record
+        :param var_value: Value of variable to record
+        """
+        await self.record_nowait(var_name, var_value)
+
+    def record_nowait(self, var_name, var_value):
+        """
+        Fire-and-forget version of :meth:`.record`. It queues the message on the socket and returns immediately
+        without having to be awaited. Errors during sending are logged.
+
+        :param var_name: Name of variable to record
+        :param var_value: Value of variable to record
+        :return: A future that is done when the message has been handed over to ZMQ. It can be ignored.
+        """
+        assert not messages.is_sentinel(var_value), \
+            "You cannot record a value {} since this conflicts with the internal SENTINEL string"
+        return self._send(var_name, messages.encode(var_name, var_value, self.id,
+                                                    messages.compression_for(self.compression, var_name)))
+
+    async def record_many(self, var_dict, x=None):
+        """
+        Coroutine that records several variables at once, packing the real scalars into a single message. See
+        :meth:`.PlotRecorder.record_many`
+
+        :param dict var_dict: Dictionary mapping variable names to their values
+        :param x: Optional x value of all the variables. If given, each variable is recorded as a tuple `(value, x)`
+        """
+        await asyncio.gather(*self.record_many_nowait(var_dict, x))
+
+    def record_many_nowait(self, var_dict, x=None):
+        """
+        Fire-and-forget version of :meth:`.record_many`.
+
+        :param dict var_dict: Dictionary mapping variable names to their values
+        :param x: Optional x value of all the variables. If given, each variable is recorded as a tuple `(value, x)`
+        :return: A list of futures that can be ignored. See :meth:`.record_nowait`
+        """
+        scalars, others = messages.split_scalars(var_dict, x)
+        futures = []
+        if scalars:
+            futures = [self._send(list(scalars), frames) for frames in self.rows.encode(scalars, x)]
+        futures.extend(self.record_nowait(var_name, var_value if x is None else (var_value, x))
+                       for var_name, var_value in others.items())
+        return futures
+
+    async def close(self, var_name):
+        """
+        Coroutine to be called for each variable name `var_name` to clean up the plotting process
+
+        :param var_name: Name of variable to clean up.
+        """
+        await self._send(var_name, messages.encode(var_name, SENTINEL, self.id))
+        rlogger.debug("Sent close message to topic %s", var_name)
+
+    async def flush(self):
+        """
+        Coroutine that waits until all messages sent with :meth:`.record_nowait` have been handed over to ZMQ.
+        """
+        if self._pending:
+            await asyncio.wait(list(self._pending))
+
+    def _send(self, var_name, frames):
+        future = self.socket.send_multipart(frames)
+        self._pending.add(future)
+        future.add_done_callback(self._sent)
+        rlogger.debug("Sent message to topic %s", var_name)
+        return future
+
+    def _sent(self, future):
+        self._pending.discard(future)
+        if not future.cancelled() and future.exception() is not None:
+            rlogger.error("Failed to send message: %s", future.exception())
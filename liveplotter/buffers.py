@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+# This file is part of live-plotter.
+#
+# live-plotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# live-plotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with live-plotter.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For more information see: https://github.com/anandtrex/live-plotter
+
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+
+standard_library.install_aliases()
+from builtins import object
+
+import numpy as np
+
+
+class RingBuffer(object):
+    """
+    A preallocated circular buffer for the last `capacity` values of a stream, e.g. the history of a plotted
+    variable. Memory use is bounded regardless of how many values are appended.
+
+    Every value is stored twice, at index `i` and `i + capacity` of the underlying array, so that the contents are
+    always available in order as a contiguous view (see :meth:`.view`) without copying.
+
+    :param int capacity: Maximum number of values kept
+    :param tuple shape: Shape of each value. The default `()` is for scalars.
+    :param dtype: numpy dtype of the values
+    """
+
+    def __init__(self, capacity, shape=(), dtype=np.float64):
+        assert capacity > 0, "capacity should be positive"
+        self.capacity = capacity
+        self.data = np.zeros((2 * capacity,) + tuple(shape), dtype=dtype)
+        self.head = 0
+        self.size = 0
+        self.total = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, value):
+        """
+        Appends one value, overwriting the oldest one if the buffer is full.
+
+        :param value: The value, of the shape given in the constructor
+        """
+        self.data[self.head] = value
+        self.data[self.head + self.capacity] = value
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self.total += 1
+
+    def extend(self, values):
+        """
+        Appends several values at once.
+
+        :param values: An array with the values along the first axis
+        """
+        values = np.asarray(values, dtype=self.data.dtype)
+        n_values = len(values)
+        if n_values == 0:
+            return
+        self.total += n_values
+        if n_values > self.capacity:
+            values = values[-self.capacity:]
+            self.head = (self.head + n_values - self.capacity) % self.capacity
+            n_values = self.capacity
+        idx = (self.head + np.arange(n_values)) % self.capacity
+        self.data[idx] = values
+        self.data[idx + self.capacity] = values
+        self.head = (self.head + n_values) % self.capacity
+        self.size = min(self.size + n_values, self.capacity)
+
+    def view(self):
+        """
+        :return: A (read-only) view of the stored values from oldest to newest. It is only valid until the next
+         :meth:`.append` or :meth:`.extend`.
+        """
+        end = self.head + self.capacity
+        view = self.data[end - self.size:end]
+        view.flags.writeable = False
+        return view
+
+    def clear(self):
+        """
+        Removes all values.
+        """
+        self.head = 0
+        self.size = 0
+
+
+def x_dtype(x):
+    """
+    :param x: The first x value of a series
+    :return: The dtype for a :class:`.RingBuffer` of x values like `x`: float64 for real numbers, and the dtype of
+     `x` otherwise, e.g. datetime64, or object for :class:`datetime.datetime`
+    """
+    dtype = np.asarray(x).dtype
+    return np.float64 if dtype.kind in 'biuf' else dtype
+
+
+def decimate(ys, max_points):
+    """
+    Chooses the indices of at most about `max_points` samples of the series `ys` to plot, without losing its visual
+    envelope: the series is split into equally sized buckets and the minimum and maximum of each bucket are kept.
+
+    :param ys: Array with the samples along the first axis. For 2-D arrays, the minimum and maximum of each column are
+     kept, so the number of buckets is reduced accordingly.
+    :param int max_points: Approximate maximum number of indices to return
+    :return: Sorted array of indices into `ys`
+    """
+    ys = np.asarray(ys)
+    n_samples = len(ys)
+    if n_samples <= max_points:
+        return np.arange(n_samples)
+
+    n_cols = 1 if ys.ndim == 1 else ys.shape[1]
+    n_buckets = max(1, max_points // (2 * n_cols))
+    bucket_size = -(-n_samples // n_buckets)
+    n_buckets = -(-n_samples // bucket_size)
+
+    # The last bucket is padded with its last sample
+    padded = np.concatenate([ys, np.repeat(ys[-1:], n_buckets * bucket_size - n_samples, axis=0)])
+    buckets = padded.reshape((n_buckets, bucket_size) + ys.shape[1:])
+    offsets = (np.arange(n_buckets) * bucket_size).reshape((n_buckets,) + (1,) * (ys.ndim - 1))
+    indices = np.concatenate([(buckets.argmin(axis=1) + offsets).ravel(), (buckets.argmax(axis=1) + offsets).ravel(),
+                              [0, n_samples - 1]])
+    return np.unique(np.minimum(indices, n_samples - 1))
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+# This file is part of live-plotter.
+#
+# live-plotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# live-plotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with live-plotter.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For more information see: https://github.com/anandtrex/live-plotter
+
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+
+standard_library.install_aliases()
+from builtins import object
+
+import logging
+import queue
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+from liveplotter import SENTINEL
+from liveplotter import messages
+
+elogger = logging.getLogger('liveplotter.embedded')
+
+
+class EmbeddedPlotRecorder(object):
+    """
+    This runs plotters inside the process that records the data, e.g. in a notebook or a single-process tool. It has
+    the same interface as :class:`~liveplotter.plotrecorder.PlotRecorder`, but recorded values are neither pickled
+    nor copied: a reference to the value is put directly into a bounded queue of each plotter of that variable.
+
+    **NOTE:** Since only a reference is passed, do not modify a recorded array in place afterwards. Record a copy if you
+    need to.
+
+    The plotters are the usual subclasses of :class:`~liveplotter.plotter.PlotterBase`, added with :meth:`.add` instead
+    of being started as separate processes. They are drawn either on the GUI event loop of the main thread with
+    :meth:`.show`, or on demand (e.g. on a headless canvas) with :meth:`.draw`.
+
+    :param int queue_size: Maximum number of values buffered for each plotter between two plot updates. When the
+     queue of a plotter is full, :meth:`.record` processes the pending values right away if it is called from the
+     thread that created this recorder (which is the one that draws the plots), and waits for the GUI to catch up
+     otherwise. Values for plotters whose figure has been closed, or whose variable has been closed, are dropped.
+    """
+
+    def __init__(self, queue_size=1000):
+        self.queue_size = queue_size
+        self.plotters = defaultdict(list)
+        self.thread = threading.current_thread()
+        # How often (in seconds) a recording thread waiting for a full queue checks whether the plotter has stopped
+        self.put_timeout = 0.1
+
+    def add(self, plotter):
+        """
+        Initializes `plotter` in this process and subscribes it to its variable.
+
+        :param plotter: An instance of a subclass of :class:`~liveplotter.plotter.PlotterBase`, that has not been
+         started.
+        :return: The plotter
+        """
+        plotter.entity_name = threading.current_thread().name
+        plotter.queue = queue.Queue(maxsize=self.queue_size)
+        plotter.init(**plotter.init_kwargs)
+        self.plotters[plotter.var_name].append(plotter)
+        elogger.info("Added plotter for %s in thread %s", plotter.var_name, plotter.entity_name)
+        return plotter
+
+    def record(self, var_name, var_value):
+        """
+        Call this method each time you want to record a variable with name `var_name` and value `var_value`.
+
+        :param var_name: Name of variable to record
+        :param var_value: Value of variable to record
+        """
+        assert not messages.is_sentinel(var_value), \
+            "You cannot record a value {} since this conflicts with the internal SENTINEL string"
+        self._put(var_name, var_value)
+
+    def record_many(self, var_dict, x=None):
+        """
+        Records several variables at once. As with :meth:`~liveplotter.plotrecorder.PlotRecorder.record_many`, the
+        real scalars (and a real `x` along with them) are recorded as `numpy.float64`, so the plotters receive the same
+        values as from a :class:`~liveplotter.plotrecorder.PlotRecorder`. Other values, and all values if `x` is not a
+        real number (e.g. a datetime), are recorded as with :meth:`.record`.
+
+        :param dict var_dict: Dictionary mapping variable names to their values
+        :param x: Optional x value of all the variables. If given, each variable is recorded as a tuple `(value, x)`
+        """
+        scalars, others = messages.split_scalars(var_dict, x)
+        row_x = None if x is None or not scalars else np.float64(x)
+        for var_name, var_value in scalars.items():
+            var_value = np.float64(var_value)
+            self.record(var_name, var_value if row_x is None else (var_value, row_x))
+        for var_name, var_value in others.items():
+            self.record(var_name, var_value if x is None else (var_value, x))
+
+    def close(self, var_name):
+        """
+        Call this method for each variable name `var_name` to stop updating its plots.
+
+        :param var_name: Name of variable to clean up.
+        """
+        self._put(var_name, SENTINEL)
+
+    def draw(self):
+        """
+        Hands all values recorded since the last call to the plotters and redraws their figures. Use this to plot
+        without a GUI event loop, e.g. on a headless (Agg) canvas, or in a notebook after each chunk of work.
+        """
+        for plotter in self._all_plotters():
+            plotter.frame()
+
+    def show(self, block=True):
+        """
+        Updates the plots from the GUI event loop of the calling (main) thread, at the rate chosen by the scheduler of
+        each plotter. With `block=True` this blocks until all figures are closed, so the recording has to happen in
+        another thread.
+
+        :param bool block: Passed on to :func:`matplotlib.pyplot.show`
+        """
+        plotters = self._all_plotters()
+        for plotter in plotters:
+            plotter.start_timer()
+        if plotters:
+            plotters[0].plt.show(block=block)
+
+    def _all_plotters(self):
+        return [plotter for plotters in self.plotters.values() for plotter in plotters]
+
+    def _put(self, var_name, var_value):
+        for plotter in self.plotters.get(var_name, []):
+            if not self._is_plotting(plotter):
+                continue
+            try:
+                plotter.queue.put_nowait((0, var_name, var_value))
+                continue
+            except queue.Full:
+                pass
+            if threading.current_thread() is self.thread:
+                plotter.receive()
+                if self._is_plotting(plotter):
+                    plotter.queue.put_nowait((0, var_name, var_value))
+                continue
+            # Wait for the GUI to catch up, but not for plotters that have stopped
+            while True:
+                try:
+                    plotter.queue.put((0, var_name, var_value), timeout=self.put_timeout)
+                    break
+                except queue.Full:
+                    if not self._is_plotting(plotter):
+                        elogger.debug("Dropped value of %s since its plotter has stopped", var_name)
+                        break
+        elogger.debug("Queued value of %s", var_name)
+
+    @staticmethod
+    def _is_plotting(plotter):
+        # False once the plotter has received the SENTINEL or its figure has been closed
+        return not plotter._exit.is_set() and plotter.plt.fignum_exists(plotter.fig.number)
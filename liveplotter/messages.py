@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+
+# This file is part of live-plotter.
+#
+# live-plotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# live-plotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with live-plotter.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For more information see: https://github.com/anandtrex/live-plotter
+
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+
+standard_library.install_aliases()
+
+import logging
+import numbers
+import os
+import pickle
+import struct
+import zlib
+from timeit import default_timer
+
+import numpy as np
+
+from liveplotter import SENTINEL
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+mlogger = logging.getLogger('liveplotter.messages')
+
+
+def encode_topic(var_name):
+    """
+    Encodes the variable name `var_name` into the ZMQ topic frame. The same bytes are used by the subscribers to set
+    up their subscription filters.
+
+    :param var_name: Name of the variable
+    :return: The topic as bytes
+    """
+    return pickle.dumps(var_name, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+# Every recorder puts a random id at the start of the header frame of its messages, so that subscribers can tell
+# recorders apart even when they all connect to the same socket (or are forwarded through a proxy).
+RECORDER_ID_SIZE = 8
+
+
+def new_recorder_id():
+    """
+    :return: A new random recorder id
+    """
+    return os.urandom(RECORDER_ID_SIZE)
+
+
+def encode(var_name, var_value, recorder_id, compression=None):
+    """
+    Encodes a recorded variable into the list of frames that is sent with `send_multipart`: the topic, a header with
+    the id of the recorder followed by the name of the codec if the value is compressed, and the pickled (and
+    possibly compressed) value.
+
+    :param var_name: Name of the variable
+    :param var_value: Value of the variable
+    :param bytes recorder_id: Id of the recorder, see :func:`.new_recorder_id`
+    :param Compression compression: How to compress the value, if at all
+    :return: A list of frames
+    """
+    payload = pickle.dumps(var_value, protocol=pickle.HIGHEST_PROTOCOL)
+    if compression is not None and len(payload) >= compression.threshold:
+        return [encode_topic(var_name), recorder_id + compression.codec.encode('ascii'), compression.compress(payload)]
+    return [encode_topic(var_name), recorder_id, payload]
+
+
+def decode(frames):
+    """
+    Inverse of :func:`.encode`. Messages of two frames (the topic and the pickled value), as sent by earlier versions,
+    are decoded too.
+
+    :param frames: The list of frames received with `recv_multipart`
+    :return: A tuple `(recorder_id, var_name, var_value)`. `recorder_id` is None for messages without a header.
+    """
+    recorder_id, payload = None, frames[-1]
+    if len(frames) == 3:
+        recorder_id, codec = frames[1][:RECORDER_ID_SIZE], frames[1][RECORDER_ID_SIZE:]
+        if codec:
+            payload = decompress(codec.decode('ascii'), payload)
+    return recorder_id, pickle.loads(frames[0]), pickle.loads(payload)
+
+
+class Compression(object):
+    """
+    Describes how a recorder compresses the values of a variable. Values whose pickled size is below `threshold` bytes
+    are sent uncompressed. The codec is named in the header of each compressed message, so subscribers don't need to
+    be configured.
+
+    :param str codec: 'zlib', or 'lz4' (requires the `lz4` package on both sides), which is much faster at a lower
+     compression ratio
+    :param int level: Compression level of the codec
+    :param int threshold: Minimum size in bytes for values to be compressed
+    """
+
+    def __init__(self, codec='zlib', level=1, threshold=1 << 16):
+        if codec not in ('zlib', 'lz4'):
+            raise ValueError("Unknown codec {}. Use 'zlib' or 'lz4'".format(codec))
+        if codec == 'lz4' and lz4_frame is None:
+            raise ImportError("The lz4 codec requires the lz4 package. Install it with `pip install lz4`")
+        self.codec = codec
+        self.level = level
+        self.threshold = threshold
+
+    def compress(self, payload):
+        if self.codec == 'zlib':
+            return zlib.compress(payload, self.level)
+        return lz4_frame.compress(payload, compression_level=self.level)
+
+
+def decompress(codec, payload):
+    """
+    Decompresses a payload compressed with :class:`.Compression`
+
+    :param str codec: The name of the codec from the message header
+    :param payload: The compressed bytes
+    :return: The decompressed bytes
+    """
+    if codec == 'zlib':
+        return zlib.decompress(payload)
+    if codec == 'lz4':
+        if lz4_frame is None:
+            raise ImportError("Received a value compressed with lz4, which requires the lz4 package. "
+                              "Install it with `pip install lz4`")
+        return lz4_frame.decompress(payload)
+    raise ValueError("Unknown codec {}".format(codec))
+
+
+def compression_for(compression, var_name):
+    """
+    :param compression: A :class:`.Compression` for all variables, or a dictionary mapping variable names to their
+     :class:`.Compression`, where the key None gives the default
+    :param var_name: Name of the variable
+    :return: The :class:`.Compression` for `var_name`, or None
+    """
+    if isinstance(compression, dict):
+        return compression.get(var_name, compression.get(None))
+    return compression
+
+
+def is_sentinel(var_value):
+    """
+    :return: True if `var_value` is the internal SENTINEL that signals the end of a variable's stream
+    """
+    return isinstance(var_value, type(SENTINEL)) and var_value == SENTINEL
+
+
+# Many scalars recorded together with `record_many` are sent as one row of float64 values. The names of the columns
+# (the "schema") are sent separately with a small id, which the rows refer to.
+SCHEMA_TOPIC = encode_topic('__liveplotter_schema__')
+ROW_TOPIC = encode_topic('__liveplotter_row__')
+_SCHEMA_ID = struct.Struct('<I')
+
+
+def split_scalars(var_dict, x=None):
+    """
+    Splits the variables in `var_dict` into real scalars, which can be packed into a row, and all the others.
+
+    :param dict var_dict: Dictionary mapping variable names to their values
+    :param x: Optional x value of all the variables. Rows can only hold a real x, so if `x` is anything else (e.g. a
+     datetime), all the variables are returned as others, with the real scalars converted to `numpy.float64` as in a
+     row.
+    :return: A tuple of two dictionaries `(scalars, others)`
+    """
+    if x is not None and not isinstance(x, numbers.Real):
+        return {}, dict((var_name, np.float64(var_value) if isinstance(var_value, numbers.Real) else var_value)
+                        for var_name, var_value in var_dict.items())
+    scalars, others = {}, {}
+    for var_name, var_value in var_dict.items():
+        if isinstance(var_value, numbers.Real):
+            scalars[var_name] = var_value
+        else:
+            others[var_name] = var_value
+    return scalars, others
+
+
+class RowEncoder(object):
+    """
+    Encodes dictionaries of scalar variables into packed rows, on the recorder side.
+
+    Each distinct set of names is assigned an id the first time it is used. Its schema is sent then, and again every
+    `schema_interval` seconds afterwards, so that subscribers that connect later can decode the rows as well. Schema
+    ids are only unique per recorder, so the header of each message also contains the id of the recorder.
+
+    :param bytes recorder_id: Id of the recorder, see :func:`.new_recorder_id`
+    :param float schema_interval: Time (in seconds) after which a schema is sent again
+    """
+
+    def __init__(self, recorder_id, schema_interval=1.):
+        self.recorder_id = recorder_id
+        self.schema_interval = schema_interval
+        self.schemas = {}
+        self.last_sent = {}
+
+    def encode(self, scalars, x=None):
+        """
+        :param dict scalars: Dictionary mapping variable names to scalar values
+        :param x: Optional real x value shared by all the variables
+        :return: A list of messages (each a list of frames) to send: the row, preceded by its schema if due
+        """
+        assert x is None or isinstance(x, numbers.Real), "Only a real x value can be packed into a row"
+        names = tuple(scalars)
+        key = (names, x is not None)
+        schema_id = self.schemas.get(key)
+        if schema_id is None:
+            schema_id = self.schemas[key] = len(self.schemas)
+            self.last_sent[schema_id] = None
+        header = self.recorder_id + _SCHEMA_ID.pack(schema_id)
+
+        message_list = []
+        now = default_timer()
+        if self.last_sent[schema_id] is None or now - self.last_sent[schema_id] > self.schema_interval:
+            message_list.append([SCHEMA_TOPIC, header, pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL)])
+            self.last_sent[schema_id] = now
+
+        row = np.fromiter(scalars.values(), dtype='<f8', count=len(names))
+        if x is not None:
+            row = np.append(row, x)
+        message_list.append([ROW_TOPIC, header, row.tobytes()])
+        return message_list
+
+
+class RowDecoder(object):
+    """
+    Decodes the packed rows sent by :class:`.RowEncoder`, on the subscriber side, keeping only the columns of the
+    variables `var_names`.
+
+    :param var_names: List of the names of the variables to decode
+    """
+
+    def __init__(self, var_names):
+        self.var_names = set(var_names)
+        # (recorder id, schema id) -> (has_x, list of (var_name, column))
+        self.schemas = {}
+
+    def decode(self, frames):
+        """
+        Decodes a schema or a row message.
+
+        :param frames: The list of frames received
+        :return: A list of `(recorder_id, var_name, var_value)` tuples, with `var_value` a `numpy.float64`, or a
+         tuple `(var_value, x)` if an x value was recorded. It is empty for schema messages and for rows whose schema
+         is not known yet.
+        """
+        recorder_id = frames[1][:RECORDER_ID_SIZE]
+        schema_id, = _SCHEMA_ID.unpack(frames[1][RECORDER_ID_SIZE:])
+        if frames[0] == SCHEMA_TOPIC:
+            names, has_x = pickle.loads(frames[2])
+            self.schemas[(recorder_id, schema_id)] = (has_x, [(var_name, column)
+                                                              for column, var_name in enumerate(names)
+                                                              if var_name in self.var_names])
+            return []
+
+        schema = self.schemas.get((recorder_id, schema_id))
+        if schema is None:
+            mlogger.debug("Dropping row with unknown schema %d", schema_id)
+            return []
+        has_x, columns = schema
+        row = np.frombuffer(frames[2], dtype='<f8')
+        if has_x:
+            x = row[-1]
+            return [(recorder_id, var_name, (row[column], x)) for var_name, column in columns]
+        return [(recorder_id, var_name, row[column]) for var_name, column in columns]
+
+
+def is_row(frames):
+    """
+    :return: True if `frames` is a schema or row message of :class:`.RowEncoder`
+    """
+    return frames[0] in (SCHEMA_TOPIC, ROW_TOPIC)
+
@@ -27,11 +27,11 @@ standard_library.install_aliases()
 from builtins import object
 
 import logging
-import pickle
 
 import zmq
 
-from liveplotter import PORT, SENTINEL
+from liveplotter import PORT, SENTINEL, endpoint
+from liveplotter import messages
 
 rlogger = logging.getLogger('liveplotter.plotrecorder')
 
@@ -40,16 +40,31 @@ class PlotRecorder(object):
     """
     This is a ZMQ publisher
 
-    :param int port: The port number to publish data (and subscribe to data)
+    :param port: The port number to publish data (and subscribe to data) on all interfaces, or a full ZMQ endpoint,
+     e.g. `'tcp://vizhost:5155'` together with `bind=False` to send to a plotter on another host
+    :param bool bind: Whether to bind to the endpoint (the default) and let the plotters connect, or to connect to a
+     plotter (or proxy) that binds instead
+    :param compression: A :class:`~liveplotter.messages.Compression` to compress large values, or a dictionary
+     mapping variable names to their :class:`~liveplotter.messages.Compression` (the key None gives the default).
+     Values are not compressed by default.
+    :param float schema_interval: How often (in seconds) the variable names of :meth:`.record_many` are sent again for
+     plotters that start later
     """
 
-    def __init__(self, port=PORT):
+    def __init__(self, port=PORT, schema_interval=1., bind=True, compression=None):
         context = zmq.Context()
         self.port = port
+        self.compression = compression
         self.socket = context.socket(zmq.PUB)
-        self.socket.bind("tcp://*:%d" % self.port)
-
-        rlogger.info("Listening on port %d", self.port)
+        if bind:
+            self.socket.bind(endpoint(port, '*'))
+            rlogger.info("Listening on %s", endpoint(port, '*'))
+        else:
+            self.socket.connect(endpoint(port))
+            rlogger.info("Connected to %s", endpoint(port))
+        # Sent with every message, so that subscribers can tell the recorders apart
+        self.id = messages.new_recorder_id()
+        self.rows = messages.RowEncoder(self.id, schema_interval)
 
     def record(self, var_name, var_value):
         """
@@ -59,20 +74,37 @@ class PlotRecorder(object):
         :param var_name: Name of variable to record
         :param var_value: Value of variable to record
         """
-        assert not isinstance(var_value, type(SENTINEL)) or var_value != SENTINEL, \
+        assert not messages.is_sentinel(var_value), \
             "You cannot record a value {} since this conflicts with the internal SENTINEL string"
-        topic = pickle.dumps(var_name, protocol=pickle.HIGHEST_PROTOCOL)
-        messagedata = pickle.dumps(var_value, protocol=pickle.HIGHEST_PROTOCOL)
-        self.socket.send_multipart([topic, messagedata])
+        self.socket.send_multipart(messages.encode(var_name, var_value, self.id,
+                                                   messages.compression_for(self.compression, var_name)))
         rlogger.debug("Sent message to topic %s", var_name)
 
+    def record_many(self, var_dict, x=None):
+        """
+        Records several variables at once, e.g. all the scalars of a training step. The real scalars are packed into a
+        single message with one float64 value per variable, so the cost per call hardly depends on how many
+        variables there are. Other values, and all values if `x` is not a real number (e.g. a datetime), are recorded
+        as with :meth:`.record`.
+
+        For the messages to be small, use the same set of names in the same order in each call.
+
+        :param dict var_dict: Dictionary mapping variable names to their values
+        :param x: Optional x value of all the variables. If given, each variable is recorded as a tuple `(value, x)`
+        """
+        scalars, others = messages.split_scalars(var_dict, x)
+        if scalars:
+            for frames in self.rows.encode(scalars, x):
+                self.socket.send_multipart(frames)
+            rlogger.debug("Sent row of topics %s", list(scalars))
+        for var_name, var_value in others.items():
+            self.record(var_name, var_value if x is None else (var_value, x))
+
     def close(self, var_name):
         """
         Call this method for each variable name `var_name` to clean up the plotting process
 
         :param var_name: Name of variable to clean up.
         """
-        topic = pickle.dumps(var_name, protocol=pickle.HIGHEST_PROTOCOL)
-        messagedata = pickle.dumps(SENTINEL, protocol=pickle.HIGHEST_PROTOCOL)
-        self.socket.send_multipart([topic, messagedata])
+        self.socket.send_multipart(messages.encode(var_name, SENTINEL, self.id))
         rlogger.debug("Sent close message to topic %s", var_name)
@@ -27,13 +27,18 @@ from future import standard_library
 standard_library.install_aliases()
 
 import logging
-import pickle
+import queue
 from multiprocessing import Process, Event, current_process
+from timeit import default_timer
 
-import zmq
-import matplotlib.animation as animation
+import numpy as np
 
-from liveplotter import PORT, SENTINEL
+from liveplotter import PORT
+from liveplotter import messages
+from liveplotter.buffers import RingBuffer
+from liveplotter.scheduler import FrameScheduler
+from liveplotter.transforms import make_transform
+from liveplotter.subscriber import AsyncSubscriber, SubscriberThread
 
 plogger = logging.getLogger('liveplotter.plotter')
 
@@ -42,16 +47,33 @@ class PlotterBase(Process):
     """
     This is a ZMQ subscriber.
     To implement your own plotters, use this as your base class and implement functions :meth:`.plot_loop` and
-    :meth:`plot_once` as described in their respective documentation
+    :meth:`.draw_frame` as described in their respective documentation
 
     See provided implementations below in :mod:`liveplotter.plotter_impls`
 
+    The plot is redrawn based on wall time rather than on the number of received values: see
+    :class:`~liveplotter.scheduler.FrameScheduler`.
+
     :param var_name: The name of the variable this class plots. This should match the variable name recorded by the
      class:`.PlotRecorder` class.
-    :param int port: The port number to subscribe to data
+    :param port: The port number on localhost to subscribe to data, or a full ZMQ endpoint (e.g.
+     `'tcp://node12:5155'`), or a list of them to subscribe to the same variable recorded by several recorders (see
+     :attr:`.source`). Several recorders can also connect to one endpoint bound with `bind=True`.
+    :param bool bind: Whether to connect to the recorders (the default), or to bind to the endpoints and let the
+     recorders connect. See :class:`~liveplotter.subscriber.AsyncSubscriber`.
+    :param int queue_size: Maximum number of received values that are buffered between two plot updates
+    :param float fps: Target number of plot updates per second
+    :param float cpu_budget: Maximum fraction of the time to spend on processing values and drawing. The plot is
+     updated less often than `fps` when drawing gets too expensive.
+    :param transforms: Extra series to derive from the received values and draw on the same axes (or, for
+     spectrograms, on axes below), as a dictionary mapping the name of each series to a transform specification
+     accepted by :func:`~liveplotter.transforms.make_transform`, e.g. `{'smoothed': ('ema', {'alpha': 0.01})}`.
+     Transforms are applied to scalar and vector values, with the same x values as the plot.
+    :param int derived_history: Maximum number of values kept for each derived series
     """
 
-    def __init__(self, var_name, port=PORT, **init_kwargs):
+    def __init__(self, var_name, port=PORT, queue_size=1000, fps=10., cpu_budget=0.5, transforms=None,
+                 derived_history=10000, bind=False, **init_kwargs):
 
         super().__init__()
 
@@ -59,8 +81,24 @@ class PlotterBase(Process):
 
         self.var_name = var_name
         self.port = port
+        self.bind = bind
+        self.queue_size = queue_size
+        self.scheduler = FrameScheduler(fps=fps, cpu_budget=cpu_budget)
         self.entity_name = None
-        self.socket = None
+        self.subscriber = None
+        self.queue = None
+        self.timer = None
+        self.it = 0
+        # The id of the recorder that sent the value passed to plot_loop
+        self.source = 0
+        # The recorders that sent values and have not closed the variable yet
+        self._open_sources = set()
+        self.transforms = dict((name, make_transform(spec)) for name, spec in (transforms or {}).items())
+        self.derived_history = derived_history
+        # For each derived series, a buffer for the x values and one for the values, and its artists
+        self.derived = {}
+        self.derived_artists = {}
+        self.derived_ax = None
         self.fig = None
         self.plt = None
         self.init_kwargs = init_kwargs
@@ -86,50 +124,170 @@ class PlotterBase(Process):
         self.entity_name = current_process().name
         plogger.info("Starting new thread %s", self.entity_name)
 
-        self.context = zmq.Context()
-        self.socket = self.context.socket(zmq.SUB)
-
-        self.socket.connect("tcp://localhost:%d" % self.port)
-        topic = pickle.dumps(self.var_name, protocol=pickle.HIGHEST_PROTOCOL)
-
-        self.socket.setsockopt(zmq.SUBSCRIBE, topic)
-        plogger.info("Subscribed to topic %s on port %d", self.var_name, self.port)
+        # Values are received and decoded continuously in a background thread, and handed over through a bounded
+        # queue to the GUI timer below
+        self.subscriber = SubscriberThread(AsyncSubscriber(self.var_name, port=self.port, bind=self.bind),
+                                           maxsize=self.queue_size)
+        self.queue = self.subscriber.queue
+        self.subscriber.start()
 
         self.init(**self.init_kwargs)
-        # Reference to animation required so that GC doesn't clean it up.
-        # WILL NOT work if you remove it!!!!!
-        # See: http://matplotlib.org/api/animation_api.html
-        ani = animation.FuncAnimation(self.fig, self.loop, interval=100)
+        self.start_timer()
         self.plt.show()
+        self.subscriber.stop()
+
+    def start_timer(self):
+        """
+        Starts a timer on the GUI event loop of the figure that calls :meth:`.frame` at the rate chosen by the
+        scheduler.
+        """
+        self.timer = self.fig.canvas.new_timer(interval=self.scheduler.interval_ms)
+        self.timer.add_callback(self.frame)
+        self.timer.start()
+
+    def frame(self):
+        """
+        Updates the plot with all the values received since the last frame and redraws the figure if anything changed.
+        The time this takes is reported to the scheduler, which adapts the timer interval.
+        """
+        start = default_timer()
+        if self.loop():
+            self.fig.canvas.draw()
+            self.scheduler.frame_done(default_timer() - start)
+            if self.timer is not None:
+                self.timer.interval = self.scheduler.interval_ms
+        if self._exit.is_set() and self.timer is not None:
+            self.timer.stop()
+
+    def loop(self, i=None):
+        """
+        Takes all the messages of the appropriate topic/var_name (given in the constructor) that have been received
+        since the last call, and calls :meth:`.plot_loop` for each of them and then :meth:`.draw_frame` once.
+        It does not wait for new messages.
 
-    def loop(self, i):
+        :param i: Unused. Kept so that this can still be used as a matplotlib animation function.
+        :return: The number of values that were received
         """
-        The function that runs the loop. At each call, it listens for a new message of the appropriate topic/var_name
-        (given in the constructor). When it receives the message, it calls :meth:`.plot_loop`
+        n_values = self.receive()
+        if n_values:
+            self.draw_derived()
+            self.draw_frame()
+        return n_values
 
-        :param int i: The plot iteration passed in by the matplotlib animation api call
+    def receive(self):
         """
-        if not self._exit.is_set():
-            plogger.debug("%d", i)
-            var_value = pickle.loads(self.socket.recv_multipart()[1])
-            plogger.debug("Received value")
-            if isinstance(var_value, type(SENTINEL)) and var_value == SENTINEL:
-                self._exit.set()
+        Calls :meth:`.plot_loop` for each of the values received since the last call, without updating the plot.
+        Values that arrive while this runs are left for the next call, so that a fast producer cannot keep a frame
+        from finishing.
+
+        :return: The number of values that were received
+        """
+        n_values = 0
+        batch = []
+        for _ in range(self.queue.qsize()):
+            if self._exit.is_set():
+                break
+            try:
+                self.source, var_name, var_value = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            plogger.debug("Received value %d", self.it)
+            self._open_sources.add(self.source)
+            if messages.is_sentinel(var_value):
+                self._open_sources.discard(self.source)
+                if not self._open_sources:
+                    self._exit.set()
             else:
-                return self.plot_loop(var_value, i)
+                self.plot_loop(var_value, self.it)
+                if self.transforms:
+                    batch.append(self._x_and_value(var_value))
+                self.it += 1
+                n_values += 1
+        if batch:
+            self._transform(batch)
+        return n_values
+
+    def _x_and_value(self, var_value):
+        # The same convention as the bundled plotters: either the value, or a tuple (value, x)
+        if isinstance(var_value, tuple) and len(var_value) == 2:
+            return var_value[1], var_value[0]
+        return self.it, var_value
+
+    def _transform(self, batch):
+        xs = np.array([x for x, _ in batch])
+        if xs.dtype.kind not in 'biuf':
+            # Dates are transformed as (fractional) days, which matplotlib draws on the same date axis
+            from matplotlib.dates import date2num
+            xs = date2num(xs)
+        xs = xs.astype(np.float64)
+        values = np.array([value for _, value in batch], dtype=np.float64)
+        if values.ndim > 2:
+            return
+        for name, transform in self.transforms.items():
+            out_xs, out_values = transform(xs, values)
+            if name not in self.derived:
+                self.derived[name] = (RingBuffer(self.derived_history),
+                                      RingBuffer(self.derived_history, shape=out_values.shape[1:]))
+            x_buffer, value_buffer = self.derived[name]
+            x_buffer.extend(out_xs)
+            value_buffer.extend(out_values)
+
+    def draw_derived(self):
+        """
+        Updates the artists of the series derived with the `transforms` given in the constructor. Lines are drawn on
+        the first axes of `self.fig`, and spectrograms on new axes below it. This is called once per frame, before
+        :meth:`.draw_frame`.
+        """
+        for name, (x_buffer, value_buffer) in self.derived.items():
+            if len(x_buffer) == 0:
+                continue
+            xs, values = x_buffer.view(), value_buffer.view()
+            if self.transforms[name].kind == 'image':
+                self._draw_derived_image(name, xs, values)
+                continue
+            if name not in self.derived_artists:
+                n_lines = 1 if values.ndim == 1 else values.shape[1]
+                ax = self.fig.axes[0]
+                self.derived_artists[name] = [ax.plot([], [], linestyle='--', label=name if j == 0 else None)[0]
+                                              for j in range(n_lines)]
+                ax.legend(loc='upper left')
+            for j, line in enumerate(self.derived_artists[name]):
+                line.set_data(xs, values if values.ndim == 1 else values[:, j])
+
+    def _draw_derived_image(self, name, xs, values):
+        if name not in self.derived_artists:
+            if self.derived_ax is None:
+                from mpl_toolkits.axes_grid1 import make_axes_locatable
+                self.derived_ax = make_axes_locatable(self.fig.axes[0]).append_axes('bottom', size='100%', pad=0.5)
+            self.derived_artists[name] = self.derived_ax.imshow(values.T, origin='lower', aspect='auto')
+            self.derived_ax.set_title(name)
+            self.derived_ax.set_ylabel('Frequency bin')
+        image = self.derived_artists[name]
+        image.set_data(values.T)
+        image.set_extent((xs[0], xs[-1], 0, values.shape[1]))
+        image.set_clim(values.min(), values.max())
+        self.derived_ax.set_xlim(xs[0], xs[-1])
 
     def plot_loop(self, var_value, i):
         """
-        This method is called each time the plot needs to be updated. This should return an iterable of matplotlib
-        :class:`matplotlib.artist.Artist`
+        This method is called once for each received value. It should store the value (or whatever is needed from it)
+        for the next call to :meth:`.draw_frame`. Plotters that don't implement :meth:`.draw_frame` can instead update
+        the plot directly here.
 
         **NOTE:** This method should only use the local variables `self.plt` and `self.fig` etc. for plotting. Do not use
         global variables, since this can cause problems due to the multiprocessing being used (and matplotlib's limited
         support for it)
 
         :param object var_value: The value of the object recorded using the :meth:`.PlotRecorder.record` call.
-        :param int i: The iteration number of the plot
-        :return: An iterable of :class:`matplotlib.artist.Artist`
+        :param int i: The iteration number of the plot, i.e. the number of values received before this one
 
         """
         raise NotImplementedError()
+
+    def draw_frame(self):
+        """
+        This method is called once per frame, after :meth:`.plot_loop` has been called for all the values received
+        since the last frame. Override it to update the matplotlib artists from the stored values. The figure is
+        redrawn afterwards.
+        """
+        pass
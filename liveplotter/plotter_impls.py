@@ -27,14 +27,24 @@ from future import standard_library
 standard_library.install_aliases()
 
 import logging
+import warnings
 
 import numpy as np
+from liveplotter.buffers import RingBuffer, x_dtype
 from liveplotter.plotter import PlotterBase
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba
 from matplotlib.ticker import FixedLocator
 
 logger = logging.getLogger('liveplotter.plotter_impls')
 
 
+def _warn_plot_frequency(plot_frequency):
+    if plot_frequency is not None:
+        warnings.warn("plot_frequency is ignored: the plot is now updated based on wall time. Use the fps and "
+                      "cpu_budget arguments of PlotterBase instead.", DeprecationWarning)
+
+
 class GeneralPlotter(PlotterBase):
     """
     This does a live plot of a line of one (and only one) variable. Look at :class:`~.GeneralArrayPlotter` if you want
@@ -43,21 +53,22 @@ class GeneralPlotter(PlotterBase):
     NOTE: None of its function should be called directly. These functions are indirectly called by :class:`~.PlotterBase` and :class:`~.PlotRecorder`
     """
 
-    def init(self, title=None, xlabel=None, ylabel=None, plot_frequency=10, **plot_kwargs):
+    def init(self, title=None, xlabel=None, ylabel=None, plot_frequency=None, history=100000, **plot_kwargs):
         """
         The init function that is called once at the beginning.
 
         :param title: Plot title
         :param xlabel: Plot xlabel
         :param ylabel: Plot y label
-        :param plot_frequency: How often should the plot be updated? In the intermediate time steps the data is stored,
-         but the plot itself is not updated
+        :param plot_frequency: Deprecated and ignored. See the `fps` and `cpu_budget` arguments of
+         :class:`~.PlotterBase`
+        :param history: Maximum number of values kept (and plotted). Older values are dropped.
         :param plot_kwargs: Any other arguments to be passed to the matplotlib plot function.
         :return: self
         """
         super().init()
 
-        self.plot_frequency = plot_frequency
+        _warn_plot_frequency(plot_frequency)
 
         logger.info("First initializing plots in thread %s", self.entity_name)
 
@@ -72,8 +83,10 @@ class GeneralPlotter(PlotterBase):
         self.ax.set_autoscale_on(True)  # enable autoscale
         self.ax.autoscale_view(True, True, True)
 
-        self.variable_list = []
-        self.xs = []
+        self.history = history
+        # The values, and their x values, whose buffer is allocated when the type of x is known (e.g. datetimes)
+        self.data = RingBuffer(history)
+        self.xs = None
 
         self.l, = self.ax.plot([], [], **plot_kwargs)  # Plot blank data
 
@@ -102,14 +115,19 @@ class GeneralPlotter(PlotterBase):
 
         assert len(var.shape) == 0, "The passed in variable should be a scalar"
 
-        self.variable_list.append(var)
+        if self.xs is None:
+            self.xs = RingBuffer(self.history, dtype=x_dtype(x))
         self.xs.append(x)
+        self.data.append(var)
 
-        if it % self.plot_frequency == 0:
-            self.l.set_data(self.xs, self.variable_list)
+    def draw_frame(self):
+        """
+        Updates the line with all the data received so far
+        """
+        self.l.set_data(self.xs.view(), self.data.view())
 
-            self.ax.relim()
-            self.ax.autoscale_view(True, True, True)
+        self.ax.relim()
+        self.ax.autoscale_view(True, True, True)
 
 
 class GeneralArrayPlotter(PlotterBase):
@@ -120,15 +138,16 @@ class GeneralArrayPlotter(PlotterBase):
     NOTE: None of its function should be called directly. These functions are indirectly called by :class:`~.PlotterBase` and :class:`~.PlotRecorder`
     """
 
-    def init(self, title=None, xlabel=None, ylabel=None, plot_frequency=10, **plot_kwargs):
+    def init(self, title=None, xlabel=None, ylabel=None, plot_frequency=None, history=100000, **plot_kwargs):
         """
         The init function that is called once at the beginning.
 
         :param title: Plot title
         :param xlabel: Plot xlabel
         :param ylabel: Plot y label
-        :param plot_frequency: How often should the plot be updated? In the intermediate time steps the data is stored,
-         but the plot itself is not updated
+        :param plot_frequency: Deprecated and ignored. See the `fps` and `cpu_budget` arguments of
+         :class:`~.PlotterBase`
+        :param history: Maximum number of values kept (and plotted). Older values are dropped.
         :param plot_kwargs: Any other arguments to be passed to the matplotlib plot function.
         :return: self
         """
@@ -136,7 +155,7 @@ class GeneralArrayPlotter(PlotterBase):
         super().init()
 
         logger.info("First initializing plots in thread %s", self.entity_name)
-        self.plot_frequency = plot_frequency
+        _warn_plot_frequency(plot_frequency)
         self.plot_kwargs = plot_kwargs
 
         self.fig, self.ax = self.plt.subplots()
@@ -150,8 +169,10 @@ class GeneralArrayPlotter(PlotterBase):
         self.ax.set_autoscale_on(True)  # enable autoscale
         self.ax.autoscale_view(True, True, True)
 
-        self.var_list = []
-        self.xs = []
+        self.history = history
+        # The vectors and their x values, allocated when the length of the vector and the type of x are known
+        self.data = None
+        self.xs = None
 
         self.lines = []
 
@@ -182,8 +203,11 @@ class GeneralArrayPlotter(PlotterBase):
 
         assert len(var.shape) == 1, "The passed in variable should be a vector, with one value for every variable"
 
-        self.var_list.append(var)
+        if self.data is None:
+            self.data = RingBuffer(self.history, shape=(len(var),))
+            self.xs = RingBuffer(self.history, dtype=x_dtype(x))
         self.xs.append(x)
+        self.data.append(var)
 
         if it == 0 and self.lines == []:
             n_y = len(var)
@@ -192,14 +216,17 @@ class GeneralArrayPlotter(PlotterBase):
                 l, = self.ax.plot([], [], **self.plot_kwargs)  # Plot blank data
                 self.lines.append(l)
 
-        if it > 0 and it % self.plot_frequency == 0:
-            var_list_arr = np.array(self.var_list)
+    def draw_frame(self):
+        """
+        Updates the lines with all the data received so far
+        """
+        xs, data = self.xs.view(), self.data.view()
 
-            for j, l in enumerate(self.lines):
-                l.set_data(self.xs, var_list_arr[:, j])
+        for j, l in enumerate(self.lines):
+            l.set_data(xs, data[:, j])
 
-            self.ax.relim()
-            self.ax.autoscale_view(True, True, True)  # NOTE: Fairly important here
+        self.ax.relim()
+        self.ax.autoscale_view(True, True, True)  # NOTE: Fairly important here
 
 
 class GeneralImagePlotter(PlotterBase):
@@ -209,18 +236,19 @@ class GeneralImagePlotter(PlotterBase):
     NOTE: None of its function should be called directly. These functions are indirectly called by :class:`~.PlotterBase` and :class:`~.PlotRecorder`
     """
 
-    def init(self, title=None, plot_frequency=10, **imshow_kwargs):
+    def init(self, title=None, plot_frequency=None, **imshow_kwargs):
         """
         The init function that is called once at the beginning.
 
         :param title: Plot title
-        :param plot_frequency: How often should the plot be updated? In the intermediate time steps the data is dropped.
+        :param plot_frequency: Deprecated and ignored. See the `fps` and `cpu_budget` arguments of
+         :class:`~.PlotterBase`. Only the latest image received before each frame is shown.
         :param imshow_kwargs: Any other arguments to be passed to the matplotlib imshow function.
         :return: self
         """
         super().init()
 
-        self.plot_frequency = plot_frequency
+        _warn_plot_frequency(plot_frequency)
         self.imshow_kwargs = imshow_kwargs
 
         logger.info("First initializing plots in thread %s", self.entity_name)
@@ -249,9 +277,13 @@ class GeneralImagePlotter(PlotterBase):
         if it == 0:
             self.im = self.ax.imshow(image, **self.imshow_kwargs)
 
-        else:
-            if it % self.plot_frequency == 0:
-                self.im.set_array(image)
+        self.image = image
+
+    def draw_frame(self):
+        """
+        Shows the latest image received
+        """
+        self.im.set_array(self.image)
 
 
 class SpikePlotter(PlotterBase):
@@ -261,15 +293,16 @@ class SpikePlotter(PlotterBase):
     NOTE: None of its function should be called directly. These functions are indirectly called by :class:`~.PlotterBase` and :class:`~.PlotRecorder`
     """
 
-    def init(self, title=None, xlabel=None, ylabel=None, plot_frequency=10, **plot_kwargs):
+    def init(self, title=None, xlabel=None, ylabel=None, plot_frequency=None, history=10000, **plot_kwargs):
         """
         The init function that is called once at the beginning.
 
         :param title: Plot title
         :param xlabel: Plot xlabel
         :param ylabel: Plot y label
-        :param plot_frequency: How often should the plot be updated? In the intermediate time steps the data is stored,
-         but the plot itself is not updated
+        :param plot_frequency: Deprecated and ignored. See the `fps` and `cpu_budget` arguments of
+         :class:`~.PlotterBase`
+        :param history: Maximum number of values kept (and plotted). Older values are dropped.
         :param plot_kwargs: Any other arguments to be passed to the matplotlib plot function.
         :return: self
         """
@@ -278,7 +311,7 @@ class SpikePlotter(PlotterBase):
 
         logger.info("First initializing plots in thread %s", self.entity_name)
 
-        self.plot_frequency = plot_frequency
+        _warn_plot_frequency(plot_frequency)
         self.plot_kwargs = plot_kwargs
 
         self.fig, self.ax = self.plt.subplots()
@@ -293,8 +326,9 @@ class SpikePlotter(PlotterBase):
         self.ax.autoscale_view(True, True, True)
 
         self.lines = []
-        self.xs = []
-        self.spikes_list = []
+        self.history = history
+        # Rows of the x value followed by the spike vector, allocated when the number of sources is known
+        self.data = None
 
         return self
 
@@ -325,8 +359,12 @@ class SpikePlotter(PlotterBase):
 
         sps = spikes * (np.arange(len(spikes)) + 1)
         sps[sps == 0.] = -10
-        self.spikes_list.append(sps)
-        self.xs.append(x)
+        if self.data is None:
+            self.data = RingBuffer(self.history, shape=(1 + len(sps),))
+        row = np.empty(1 + len(sps))
+        row[0] = x
+        row[1:] = sps
+        self.data.append(row)
 
         if it == 0 and self.lines == []:
             n_y = len(spikes)
@@ -336,11 +374,269 @@ class SpikePlotter(PlotterBase):
             self.ax.set_ylim(0, len(spikes) + 1)
             self.ax.yaxis.set_major_locator(FixedLocator([0, len(spikes) + 1]))
 
-        if it > 0 and it % self.plot_frequency == 0:
-            spike_list_arr = np.array(self.spikes_list)
-            for j, l in enumerate(self.lines):
-                l.set_data(self.xs, spike_list_arr[:, j])
+    def draw_frame(self):
+        """
+        Updates the spike raster with all the data received so far, showing the last 100 x units
+        """
+        data = self.data.view()
+        for j, l in enumerate(self.lines):
+            l.set_data(data[:, 0], data[:, j + 1])
+
+        self.ax.set_xlim(data[-1, 0] - 100, data[-1, 0])
+
+        self.ax.relim()
+
+
+class MultiRunPlotter(PlotterBase):
+    """
+    This does a live plot of the same scalar variable recorded by several runs (e.g. of a parameter sweep), with one
+    line per run on shared axes. Optionally, the median and interquartile range across the runs are drawn too.
+
+    Pass the list of ports of the :class:`~.PlotRecorder` of all the runs as the `port` argument, e.g.
+    `MultiRunPlotter('loss', port=[5155, 5156, 5157])`, or let the recorders of all the runs connect to one bound
+    endpoint, e.g. `MultiRunPlotter('loss', port='tcp://*:5155', bind=True)`. Each recorder is one run. To name the
+    runs, or to split the values of one recorder into several runs, record a 3-tuple `(value, x, run)` instead. The
+    legend shows the names of the runs, or numbers them in the order they start.
+
+    NOTE: None of its function should be called directly. These functions are indirectly called by :class:`~.PlotterBase` and :class:`~.PlotRecorder`
+    """
+
+    def init(self, title=None, xlabel=None, ylabel=None, history=10000, aggregate=True, n_grid=200, **plot_kwargs):
+        """
+        The init function that is called once at the beginning.
+
+        :param title: Plot title
+        :param xlabel: Plot xlabel
+        :param ylabel: Plot y label
+        :param history: Maximum number of values kept (and plotted) for each run
+        :param aggregate: Whether to draw the median and the interquartile range across runs
+        :param n_grid: Number of points of the common x grid that the runs are interpolated on for the aggregate
+        :param plot_kwargs: Any other arguments to be passed to the matplotlib plot function of each run.
+        :return: self
+        """
+        super().init()
+
+        logger.info("First initializing plots in thread %s", self.entity_name)
+        self.history = history
+        self.aggregate = aggregate
+        self.n_grid = n_grid
+        self.plot_kwargs = dict(dict(linewidth=0.8, alpha=0.4), **plot_kwargs)
+
+        self.fig, self.ax = self.plt.subplots()
+        if title is not None:
+            self.ax.set_title(title)
+        if xlabel is not None:
+            self.ax.set_xlabel(xlabel)
+        if ylabel is not None:
+            self.ax.set_ylabel(ylabel)
+
+        self.ax.set_autoscale_on(True)  # enable autoscale
+        self.ax.autoscale_view(True, True, True)
+
+        # Per run: buffers of the x values and the values, and a line
+        self.runs = {}
+        self.lines = {}
+        self.updated_runs = set()
+
+        if self.aggregate:
+            self.median_line, = self.ax.plot([], [], color='k', linewidth=2, label='median')
+            self.iqr = None
+
+        return self
+
+    def plot_loop(self, data, it):
+        """
+        The actual function that stores the data for the plot initialized in :meth:`~.init`
 
-            self.ax.set_xlim(self.xs[-1] - 100, self.xs[-1])
+        :param data: The data that is recorded with :class:`~.PlotRecorder` by each run. It can be a just a scalar (in
+         which case the number of values received from that run is used on the x axis) OR a 2-D tuple with the first
+         value containing the scalar to plot and the second value containing the corresponding x value OR a 3-D tuple
+         with additionally the name or number of the run as the third value.
+        :param it: The iteration number (independent of the actual x value)
+        :return:
+        """
+        run, named = self.source, False
+        if not isinstance(data, tuple):
+            var, x = data, None
+        elif len(data) == 2:
+            var, x = data
+        elif len(data) == 3:
+            var, x, run = data
+            named = True
+        else:
+            logger.error("Data is %s", data)
+            raise RuntimeError()
+
+        if run not in self.runs:
+            # Values of the same recorder are one run, numbered in the order the runs start
+            label = str(run) if named else 'run {}'.format(len(self.runs))
+            self.runs[run] = (RingBuffer(self.history, dtype=np.float64 if x is None else x_dtype(x)),
+                              RingBuffer(self.history))
+            self.lines[run], = self.ax.plot([], [], label=label, **self.plot_kwargs)
+            self.ax.legend(loc='upper right', fontsize='small', ncol=max(1, len(self.runs) // 10))
+        xs, values = self.runs[run]
+        xs.append(values.total if x is None else x)
+        values.append(var)
+        self.updated_runs.add(run)
+
+    def draw_frame(self):
+        """
+        Updates the lines of the runs that received data since the last frame, and the aggregate across runs
+        """
+        for run in self.updated_runs:
+            xs, values = self.runs[run]
+            self.lines[run].set_data(xs.view(), values.view())
+        self.updated_runs.clear()
+
+        if self.aggregate and len(self.runs) > 1:
+            self._draw_aggregate()
+
+        self.ax.relim()
+        self.ax.autoscale_view(True, True, True)
+
+    def _draw_aggregate(self):
+        series = [(_as_float(xs.view()), values.view()) for xs, values in self.runs.values() if len(xs) > 1]
+        aggregate = _aggregate(series, self.n_grid)
+        if aggregate is None:
+            return
+        grid, q1, median, q3 = aggregate
+
+        self.median_line.set_data(grid, median)
+        if self.iqr is not None:
+            self.iqr.remove()
+        self.iqr = self.ax.fill_between(grid, q1, q3, color='k', alpha=0.2, linewidth=0)
+
+
+def _as_float(xs):
+    # Dates as (fractional) days, which matplotlib draws on the same date axis
+    if xs.dtype.kind in 'biuf':
+        return xs
+    from matplotlib.dates import date2num
+    return date2num(xs)
+
+
+def _aggregate(series, n_grid):
+    """
+    Resamples several series on a common grid of x values, where all of them have data, with linear interpolation.
+
+    :param series: List of tuples `(xs, values)` of increasing x values and the corresponding values
+    :param int n_grid: Number of points of the grid
+    :return: A tuple `(grid, q1, median, q3)` with the quartiles across the series at each point of the grid, or
+     None if there are fewer than 2 series or they don't overlap
+    """
+    if len(series) < 2:
+        return None
+    lo = max(xs[0] for xs, _ in series)
+    hi = min(xs[-1] for xs, _ in series)
+    if not lo < hi:
+        return None
+    grid = np.linspace(lo, hi, n_grid)
+    resampled = np.vstack([np.interp(grid, xs, values) for xs, values in series])
+    q1, median, q3 = np.percentile(resampled, [25, 50, 75], axis=0)
+    return grid, q1, median, q3
+
+
+class TrajectoryPlotter(PlotterBase):
+    """
+    This does a live plot of the trajectory of a 2-D or 3-D state vector (e.g. a position, or coordinates in phase
+    space), showing the last `history` points as a trail that fades out towards the oldest point. The axes are fitted
+    to the trail.
+
+    The points are kept in a preallocated :class:`~liveplotter.buffers.RingBuffer` and drawn as a single line
+    collection that is updated in place, so the cost of drawing doesn't grow with the length of the run.
+
+    NOTE: None of its function should be called directly. These functions are indirectly called by :class:`~.PlotterBase` and :class:`~.PlotRecorder`
+    """
+
+    def init(self, title=None, xlabel=None, ylabel=None, zlabel=None, dims=2, history=1000, color='C0',
+             min_alpha=0.05, **collection_kwargs):
+        """
+        The init function that is called once at the beginning.
+
+        :param title: Plot title
+        :param xlabel: Plot xlabel
+        :param ylabel: Plot y label
+        :param zlabel: Plot z label (3-D only)
+        :param dims: Dimension of the recorded state vectors, 2 or 3
+        :param history: Number of points in the trail
+        :param color: Color of the trail
+        :param min_alpha: Opacity of the oldest segment of the trail. The opacity increases linearly to 1 for the newest.
+        :param collection_kwargs: Any other arguments to be passed to the matplotlib LineCollection.
+        :return: self
+        """
+        super().init()
+
+        assert dims in (2, 3), "Only 2-D and 3-D trajectories can be plotted"
+        logger.info("First initializing plots in thread %s", self.entity_name)
+        self.dims = dims
+
+        if dims == 3:
+            from mpl_toolkits.mplot3d.art3d import Line3DCollection
+            self.fig = self.plt.figure()
+            self.ax = self.fig.add_subplot(111, projection='3d')
+            self.collection = Line3DCollection([], **collection_kwargs)
+            self.ax.add_collection(self.collection, autolim=False)
+            if zlabel is not None:
+                self.ax.set_zlabel(zlabel)
+        else:
+            self.fig, self.ax = self.plt.subplots()
+            self.collection = LineCollection([], **collection_kwargs)
+            self.ax.add_collection(self.collection, autolim=False)
+        if title is not None:
+            self.ax.set_title(title)
+        if xlabel is not None:
+            self.ax.set_xlabel(xlabel)
+        if ylabel is not None:
+            self.ax.set_ylabel(ylabel)
+
+        self.points = RingBuffer(history, shape=(dims,))
+        # One color per segment, with the opacity increasing from the oldest to the newest segment
+        self.colors = np.tile(to_rgba(color), (max(history - 1, 1), 1))
+        self.colors[:, 3] = np.linspace(min_alpha, 1., len(self.colors))
+        self.head, = self.ax.plot(*([[]] * dims), marker='o', color=color, linestyle='none')
+
+        return self
+
+    def plot_loop(self, point, it):
+        """
+        The actual function that stores the data for the plot initialized in :meth:`~.init`
+
+        :param point: The state vector that is recorded with :class:`~.PlotRecorder`, a numpy array with 2 or 3
+         values (as given by `dims` in :meth:`~.init`)
+        :param it: The iteration number
+        :return:
+        """
+        point = np.asarray(point)
+        assert point.shape == (self.dims,), \
+            "The passed in variable should be a vector of {} coordinates, but its shape is {}".format(self.dims,
+                                                                                                      point.shape)
+        self.points.append(point)
+
+    def draw_frame(self):
+        """
+        Updates the trail from the latest points
+        """
+        points = self.points.view()
+        n_segments = len(points) - 1
+        if n_segments < 1:
+            return
+        # Consecutive pairs of points, as a view of shape (n_segments, 2, dims)
+        segments = np.lib.stride_tricks.sliding_window_view(points, 2, axis=0).transpose(0, 2, 1)
+        self.collection.set_segments(segments)
+        self.collection.set_color(self.colors[len(self.colors) - n_segments:])
+
+        head = points[-1]
+        self.head.set_data([head[0]], [head[1]])
+        if self.dims == 3:
+            # Line3D.set_data_3d only exists since matplotlib 3.1
+            self.head.set_3d_properties([head[2]])
+
+        # The axes follow the trail, so that it stays visible when the trajectory drifts
+        lower, upper = points.min(axis=0), points.max(axis=0)
+        margin = 0.05 * np.maximum(upper - lower, 1e-9)
+        lower, upper = lower - margin, upper + margin
+        self.ax.set_xlim(lower[0], upper[0])
+        self.ax.set_ylim(lower[1], upper[1])
+        if self.dims == 3:
+            self.ax.set_zlim(lower[2], upper[2])
 
-            self.ax.relim()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+# This file is part of live-plotter.
+#
+# live-plotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# live-plotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with live-plotter.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For more information see: https://github.com/anandtrex/live-plotter
+
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+
+standard_library.install_aliases()
+from builtins import object
+
+import logging
+
+slogger = logging.getLogger('liveplotter.scheduler')
+
+
+class FrameScheduler(object):
+    """
+    Decides how often a plot is redrawn, based on wall time rather than on the number of received values.
+
+    It aims for `fps` frames per second, but measures how long each frame takes (processing the received values and
+    drawing) and backs off so that the plotter spends at most the fraction `cpu_budget` of the time on it. The frame
+    cost is smoothed with an exponential moving average, so that a single slow frame doesn't change the rate much.
+
+    :param float fps: Target number of frames per second
+    :param float cpu_budget: Maximum fraction (0 < cpu_budget <= 1) of the wall time to spend on frames
+    :param float max_interval: Upper bound (in seconds) of the time between two frames, however expensive drawing gets
+    :param float smoothing: Weight (0 < smoothing <= 1) of the newest measurement in the moving average of the frame cost
+    """
+
+    def __init__(self, fps=10., cpu_budget=0.5, max_interval=5., smoothing=0.2):
+        assert fps > 0, "fps should be positive"
+        assert 0 < cpu_budget <= 1, "cpu_budget should be in (0, 1]"
+        assert 0 < smoothing <= 1, "smoothing should be in (0, 1]"
+
+        self.min_interval = 1. / fps
+        self.cpu_budget = cpu_budget
+        self.max_interval = max(max_interval, self.min_interval)
+        self.smoothing = smoothing
+
+        self.frame_cost = None
+        self.interval = self.min_interval
+
+    @property
+    def interval_ms(self):
+        """
+        :return: The current time between two frames in (integer) milliseconds, as expected by matplotlib timers
+        """
+        return max(1, int(round(self.interval * 1000)))
+
+    def frame_done(self, cost):
+        """
+        Call this after each frame that drew something.
+
+        :param float cost: The time (in seconds) the frame took
+        :return: The new time between two frames in seconds
+        """
+        if self.frame_cost is None:
+            self.frame_cost = cost
+        else:
+            self.frame_cost += self.smoothing * (cost - self.frame_cost)
+
+        self.interval = min(max(self.min_interval, self.frame_cost / self.cpu_budget), self.max_interval)
+        slogger.debug("Frame took %.4fs, next frame in %.4fs", cost, self.interval)
+        return self.interval
@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+
+# This file is part of live-plotter.
+#
+# live-plotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# live-plotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with live-plotter.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For more information see: https://github.com/anandtrex/live-plotter
+
+"""
+Long-run soak test of the plotters and the recorder.
+
+It drives every plotter of :mod:`liveplotter.plotter_impls` headlessly (with the Agg backend) with a synthetic stream,
+recorded from a separate thread at a fixed rate, for a configurable amount of simulated time. It samples the memory use
+(RSS), the lag (the delay from when a value is due to be recorded until it is plotted) and the time each frame takes,
+and fails when any of them grows faster than the configured slopes, so that leaks and slowdowns in long runs show up
+before they reach a cluster. Run it with::
+
+    python -m liveplotter.soak --hours 1 --rate 100 --speedup 10
+
+and see `python -m liveplotter.soak --help` for all the options. The process exits with status 1 if any plotter
+fails.
+"""
+
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+
+standard_library.install_aliases()
+from builtins import object, range
+
+import argparse
+import gc
+import inspect
+import logging
+import os
+import sys
+import threading
+import time
+from timeit import default_timer
+
+import matplotlib
+import numpy as np
+
+slogger = logging.getLogger('liveplotter.soak')
+
+
+def _scalar(rng, step):
+    return np.float64(np.sin(step / 50.) + rng.randn())
+
+
+def _vector(rng, step):
+    return np.sin(step / 50. + np.arange(5)) + rng.randn(5)
+
+
+def _image(rng, step):
+    return rng.rand(32, 32)
+
+
+def _spikes(rng, step):
+    return (rng.rand(50) < 0.05).astype(np.float64)
+
+
+def _runs(rng, step):
+    # Five runs forwarded through a single proxy, so the run is part of the value
+    return np.float64(np.exp(-step / 1e4) + rng.randn() * 0.1), float(step // 5), step % 5
+
+
+def _trajectory(rng, step):
+    return np.array([np.cos(step / 100.), np.sin(step / 70.)]) * (1. + 0.01 * rng.randn(2))
+
+
+#: The synthetic stream each plotter is driven with, as a function of a random number generator and the step
+STREAMS = {
+    'GeneralPlotter': _scalar,
+    'GeneralArrayPlotter': _vector,
+    'GeneralImagePlotter': _image,
+    'SpikePlotter': _spikes,
+    'MultiRunPlotter': _runs,
+    'TrajectoryPlotter': _trajectory,
+}
+
+#: The transforms (see :mod:`liveplotter.transforms`) soaked along with each plotter
+TRANSFORMS = {
+    'GeneralPlotter': {'mean': ('mean', {'window': 100}), 'median': ('median', {'window': 25}),
+                       'ema': ('ema', {'alpha': 0.01}), 'rate': 'rate', 'cumsum': 'cumsum',
+                       'spectrogram': ('spectrogram', {'nfft': 64})},
+    # Each transform adds a line per element of the vectors, so only one, to keep frames as cheap as for the others
+    'GeneralArrayPlotter': {'ema': ('ema', {'alpha': 0.01})},
+}
+
+
+class SoakResult(object):
+    """
+    The samples taken while soaking one plotter, and the slopes of their linear trends after the warmup.
+
+    :param str name: Name of the plotter class
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.hours = []
+        self.rss_mb = []
+        self.lag_ms = []
+        self.frame_ms = []
+        self.slopes = {}
+        self.failures = []
+
+    def add_sample(self, hours, rss_mb, lag_ms, frame_ms):
+        self.hours.append(hours)
+        self.rss_mb.append(rss_mb)
+        self.lag_ms.append(lag_ms)
+        self.frame_ms.append(frame_ms)
+
+    def check(self, warmup, max_slopes):
+        """
+        Estimates the trend of each of the sampled quantities after the warmup and compares its slope with the
+        maximum. The slope is the median of the slopes between all pairs of samples (the Theil-Sen estimator), so that
+        a few slow frames, e.g. while the machine is busy with something else, don't make the check fail.
+
+        :param float warmup: Fraction of the samples at the beginning that are ignored
+        :param dict max_slopes: Maximum slope (per simulated hour) of 'rss_mb', 'lag_ms' and 'frame_ms'
+        :return: True if no slope is too large
+        """
+        if not self.hours:
+            self.failures.append("no samples were taken")
+            return False
+        start = int(len(self.hours) * warmup)
+        hours = np.array(self.hours[start:])
+        for quantity, max_slope in sorted(max_slopes.items()):
+            values = np.array(getattr(self, quantity)[start:])
+            slope = _trend(hours, values)
+            self.slopes[quantity] = slope
+            if slope > max_slope:
+                self.failures.append("{} grows by {:.3g} per hour (maximum {:.3g})".format(quantity, slope,
+                                                                                            max_slope))
+        return not self.failures
+
+    def summary(self):
+        """
+        :return: A line with the last sample of each quantity and its slope, as computed by :meth:`.check`
+        """
+        if not self.hours:
+            return "{}: no samples".format(self.name)
+        return "{}: RSS {:.1f} MB ({:+.3g}/h), lag {:.1f} ms ({:+.3g}/h), frame {:.2f} ms ({:+.3g}/h)".format(
+            self.name, self.rss_mb[-1], self.slopes.get('rss_mb', 0.), self.lag_ms[-1], self.slopes.get('lag_ms', 0.),
+            self.frame_ms[-1], self.slopes.get('frame_ms', 0.))
+
+
+def _trend(xs, ys):
+    # Theil-Sen estimator of the slope
+    i, j = np.triu_indices(len(xs), k=1)
+    dx = xs[j] - xs[i]
+    valid = dx > 0
+    return float(np.median((ys[j] - ys[i])[valid] / dx[valid])) if np.any(valid) else 0.
+
+
+def rss_mb():
+    """
+    :return: The resident set size of this process in MB
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2. ** 20
+    except (IOError, OSError):
+        import resource
+        # Peak instead of current RSS, but it still shows growth. In KB on Linux, in bytes on macOS.
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss / 2. ** 20 if sys.platform == 'darwin' else max_rss / 2. ** 10
+
+
+class Producer(threading.Thread):
+    """
+    Records the synthetic stream of a plotter from a thread of its own, like a simulation would, at a fixed rate of
+    wall time, and closes the variable at the end. The time each value is due to be recorded is known in advance, so
+    the delay until it is plotted can be measured even when recording is held up by the plotter.
+
+    :param recorder: The recorder, only used from this thread
+    :param str var_name: Name of the recorded variable
+    :param stream: The synthetic stream, see :data:`.STREAMS`
+    :param int n_steps: Number of values to record
+    :param float rate: Values recorded per second of wall time
+    :param int seed: Seed of the synthetic stream
+    """
+
+    def __init__(self, recorder, var_name, stream, n_steps, rate, seed=0):
+        super(Producer, self).__init__(name='soak-producer')
+        self.daemon = True
+        self.recorder = recorder
+        self.var_name = var_name
+        self.stream = stream
+        self.n_steps = n_steps
+        self.rate = rate
+        self.rng = np.random.RandomState(seed)
+        self.start_time = None
+        self.error = None
+        self._finish = threading.Event()
+
+    def start(self):
+        self.start_time = default_timer()
+        super(Producer, self).start()
+
+    def due(self, step):
+        """
+        :return: The time (of :func:`timeit.default_timer`) at which value number `step` is due to be recorded
+        """
+        return self.start_time + step / self.rate
+
+    def run(self):
+        try:
+            step = 0
+            while step < self.n_steps and not self._finish.is_set():
+                due_steps = min(self.n_steps, int((default_timer() - self.start_time) * self.rate) + 1)
+                if step >= due_steps:
+                    time.sleep(max(0., min(0.001, self.due(step) - default_timer())))
+                    continue
+                for step in range(step, due_steps):
+                    self.recorder.record(self.var_name, self.stream(self.rng, step))
+                step = due_steps
+            self.recorder.close(self.var_name)
+        except Exception as e:
+            self.error = e
+            raise
+
+    def stop(self):
+        """
+        Stops recording and waits for the thread to finish
+        """
+        self._finish.set()
+        if self.is_alive():
+            self.join()
+
+
+def soak(plotter_class, hours=1., rate=100., fps=10., n_samples=200, transport='embedded', port=None, seed=0,
+         speedup=1., transforms=None, **init_kwargs):
+    """
+    Drives one plotter with its synthetic stream (see :data:`.STREAMS`) for `hours` of simulated time. A
+    :class:`.Producer` thread records `rate` values per simulated second, while the calling thread draws frames at
+    the interval chosen by the scheduler of the plotter (at most `fps` per second of wall time), as the GUI would.
+
+    The lag is the delay between the time the newest plotted value was due to be recorded and the time its frame was
+    drawn, so it also grows when the plotter holds up the producer or values are dropped.
+
+    :param plotter_class: A subclass of :class:`~liveplotter.plotter.PlotterBase` from :mod:`liveplotter.plotter_impls`
+    :param float hours: Simulated duration
+    :param float rate: Values recorded per simulated second
+    :param float fps: Target frames per second (of wall time)
+    :param int n_samples: Number of samples of RSS, lag and frame time taken over the duration
+    :param str transport: 'embedded' to pass the values by reference with an
+     :class:`~liveplotter.embedded.EmbeddedPlotRecorder`, or 'zmq' to send them through a
+     :class:`~liveplotter.plotrecorder.PlotRecorder` and receive them with the background subscriber thread
+    :param int port: The port for the 'zmq' transport
+    :param int seed: Seed of the synthetic stream
+    :param float speedup: Simulated seconds per second of wall time. Values are recorded `speedup` times faster than
+     `rate`, so that long runs can be simulated in less time.
+    :param transforms: Passed on to the plotter. Defaults to the ones in :data:`.TRANSFORMS` for its class.
+    :param init_kwargs: Passed on to the plotter
+    :return: A :class:`.SoakResult`
+    """
+    from liveplotter import PORT
+    from liveplotter.embedded import EmbeddedPlotRecorder
+
+    name = plotter_class.__name__
+    var_name = 'soak_' + name
+    if transforms is None:
+        transforms = TRANSFORMS.get(name)
+
+    wall_rate = rate * speedup
+    plotter = plotter_class(var_name, fps=fps, transforms=transforms, **init_kwargs)
+    # Enough to buffer the values recorded while the scheduler backs off as far as it can, so that a plotter that
+    # keeps up on average never holds up the producer nor (with zmq) drops values
+    plotter.queue_size = int(2 * plotter.scheduler.max_interval * wall_rate) + 10
+    subscriber = None
+    if transport == 'zmq':
+        from liveplotter.plotrecorder import PlotRecorder
+        from liveplotter.subscriber import AsyncSubscriber, SubscriberThread
+        port = port or PORT
+        recorder = PlotRecorder(port=port)
+        subscriber = SubscriberThread(AsyncSubscriber(var_name, port=port), maxsize=plotter.queue_size)
+        plotter.entity_name = name
+        plotter.queue = subscriber.queue
+        subscriber.start()
+        plotter.init(**plotter.init_kwargs)
+        time.sleep(0.5)  # Let the subscriber connect before anything is sent
+    else:
+        recorder = EmbeddedPlotRecorder(queue_size=plotter.queue_size)
+        recorder.add(plotter)
+
+    n_steps = int(hours * 3600 * rate)
+    duration = n_steps / wall_rate
+    producer = Producer(recorder, var_name, STREAMS[name], n_steps, wall_rate, seed)
+    result = SoakResult(name)
+    lags, frame_times = [], []
+    producer.start()
+    next_sample = producer.start_time + duration / n_samples
+    try:
+        while not plotter._exit.is_set():
+            time.sleep(plotter.scheduler.interval)
+            start = default_timer()
+            plotter.frame()
+            now = default_timer()
+            frame_times.append(now - start)
+            if plotter.it > 0:
+                lags.append(now - producer.due(plotter.it - 1))
+
+            if now >= next_sample and lags:
+                gc.collect()
+                result.add_sample((now - producer.start_time) * speedup / 3600., rss_mb(), 1000. * np.median(lags),
+                                  1000. * np.median(frame_times))
+                lags, frame_times = [], []
+                next_sample += duration / n_samples
+            if producer.error is not None:
+                raise producer.error
+            if not producer.is_alive() and now > producer.due(n_steps) + 10.:
+                slogger.warning("%s did not receive the end of its stream", name)
+                break
+    finally:
+        producer.stop()
+        if subscriber is not None:
+            subscriber.stop()
+        plotter.plt.close(plotter.fig)
+    return result
+
+
+def plotter_classes():
+    """
+    :return: All the plotter classes in :mod:`liveplotter.plotter_impls`
+    """
+    from liveplotter import plotter_impls
+    from liveplotter.plotter import PlotterBase
+    return [cls for _, cls in inspect.getmembers(plotter_impls, inspect.isclass)
+            if issubclass(cls, PlotterBase) and cls is not PlotterBase and cls.__module__ == plotter_impls.__name__]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m liveplotter.soak', description=__doc__.strip().split('\n\n')[1],
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--hours', type=float, default=1., help="Simulated duration for each plotter")
+    parser.add_argument('--rate', type=float, default=100., help="Values recorded per simulated second")
+    parser.add_argument('--fps', type=float, default=10., help="Target frames drawn per second")
+    parser.add_argument('--speedup', type=float, default=10.,
+                        help="Simulated seconds per second. Values are recorded this much faster than the rate.")
+    parser.add_argument('--history', type=int, default=1000,
+                        help="History kept by the plotters. Should be filled during the warmup.")
+    parser.add_argument('--samples', type=int, default=200, help="Number of samples taken for each plotter")
+    parser.add_argument('--warmup', type=float, default=0.2,
+                        help="Fraction of the samples at the beginning that are ignored")
+    parser.add_argument('--max-rss-slope', type=float, default=5., help="Maximum RSS growth in MB per hour")
+    parser.add_argument('--max-lag-slope', type=float, default=1000.,
+                        help="Maximum growth of the delay from recording to plotting in ms per hour")
+    parser.add_argument('--max-frame-slope', type=float, default=50.,
+                        help="Maximum growth of the frame time in ms per hour")
+    parser.add_argument('--transport', choices=['embedded', 'zmq'], default='embedded')
+    parser.add_argument('--port', type=int, default=None, help="Port for the zmq transport")
+    parser.add_argument('--plotters', nargs='+', default=None, help="Names of the plotters to soak (default: all)")
+    args = parser.parse_args(argv)
+
+    max_slopes = {'rss_mb': args.max_rss_slope, 'lag_ms': args.max_lag_slope, 'frame_ms': args.max_frame_slope}
+    classes = [cls for cls in plotter_classes() if args.plotters is None or cls.__name__ in args.plotters]
+
+    failed = False
+    for cls in classes:
+        if cls.__name__ not in STREAMS:
+            print("FAIL {}: no synthetic stream in liveplotter.soak.STREAMS".format(cls.__name__))
+            failed = True
+            continue
+        init_kwargs = {'derived_history': args.history}
+        if cls.__name__ != 'GeneralImagePlotter':
+            init_kwargs['history'] = args.history
+        result = soak(cls, hours=args.hours, rate=args.rate, fps=args.fps, n_samples=args.samples,
+                      transport=args.transport, port=args.port, speedup=args.speedup, **init_kwargs)
+        ok = result.check(args.warmup, max_slopes)
+        failed = failed or not ok
+        print("{} {}{}".format('ok  ' if ok else 'FAIL', result.summary(),
+                               ''.join('\n    ' + failure for failure in result.failures)))
+        sys.stdout.flush()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    matplotlib.use('Agg')
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+
+# This file is part of live-plotter.
+#
+# live-plotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# live-plotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with live-plotter.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For more information see: https://github.com/anandtrex/live-plotter
+
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import asyncio
+import logging
+import queue
+import threading
+from collections import deque
+
+import zmq
+import zmq.asyncio
+
+from liveplotter import PORT, endpoint
+from liveplotter import messages
+
+slogger = logging.getLogger('liveplotter.subscriber')
+
+
+class AsyncSubscriber(object):
+    """
+    This is an asyncio ZMQ subscriber. It receives and decodes the values recorded for one or more variables by one or
+    more :class:`~liveplotter.plotrecorder.PlotRecorder` (e.g. one for each run of a parameter sweep).
+
+    It can be used directly from within an event loop with :meth:`.recv` or by iterating over it with `async for`, or
+    it can hand over the decoded values to another thread through a bounded :class:`queue.Queue` with :meth:`.pump`
+    (see :class:`.SubscriberThread`).
+
+    The sockets are created lazily on first use, so that they belong to the event loop they are used in.
+
+    :param var_names: The name, or a list of names, of the variables to subscribe to
+    :param port: The port number on localhost to subscribe to data, or a full ZMQ endpoint (e.g.
+     `'tcp://node12:5155'`), or a list of them to subscribe to several recorders. Values are tagged with the random
+     id of the recorder that sent them (their "source"), so recorders can be told apart even when they all connect
+     to one bound endpoint.
+    :param context: An optional :class:`zmq.asyncio.Context`. A new one is created if not given.
+    :param bool bind: Whether to connect to the recorders (the default), or to bind to the endpoints (e.g.
+     `'tcp://*:5155'`) and let recorders created with `bind=False` connect, e.g. from the nodes of a cluster
+    """
+
+    def __init__(self, var_names, port=PORT, context=None, bind=False):
+        if not isinstance(var_names, (list, tuple)):
+            var_names = [var_names]
+        if not isinstance(port, (list, tuple)):
+            port = [port]
+        self.var_names = list(var_names)
+        self.ports = list(port)
+        self.bind = bind
+        self.context = context
+        self.sockets = []
+        self.poller = None
+        self.rows = messages.RowDecoder(self.var_names)
+        # Decoded values not returned yet, since one row message can contain several of the variables
+        self._pending = deque()
+        # (source, var_name) pairs that have been received from and not been closed by the recorder yet
+        self._open = set()
+        self._seen = set()
+        self._stop = threading.Event()
+
+    def connect(self):
+        """
+        Creates the sockets and subscribes to all the variables. Called automatically by :meth:`.recv`
+        """
+        if not self.sockets:
+            self.context = self.context or zmq.asyncio.Context()
+            self.poller = zmq.asyncio.Poller()
+            for port in self.ports:
+                socket = self.context.socket(zmq.SUB)
+                if self.bind:
+                    socket.bind(endpoint(port, '*'))
+                else:
+                    socket.connect(endpoint(port))
+                for var_name in self.var_names:
+                    socket.setsockopt(zmq.SUBSCRIBE, messages.encode_topic(var_name))
+                socket.setsockopt(zmq.SUBSCRIBE, messages.SCHEMA_TOPIC)
+                socket.setsockopt(zmq.SUBSCRIBE, messages.ROW_TOPIC)
+                self.poller.register(socket, zmq.POLLIN)
+                self.sockets.append(socket)
+                slogger.info("Subscribed to topics %s on %s", self.var_names, endpoint(port))
+        return self
+
+    async def recv(self):
+        """
+        Coroutine that waits for the next message.
+
+        :return: A tuple `(var_name, var_value)`. `var_value` is the SENTINEL when the variable was closed by the
+         recorder
+        """
+        source, var_name, var_value = await self.recv_from()
+        return var_name, var_value
+
+    async def recv_from(self, timeout=None):
+        """
+        Coroutine that waits for the next message from any of the sources.
+
+        :param timeout: Maximum time to wait in milliseconds, or None to wait forever
+        :return: A tuple `(source, var_name, var_value)`, where `source` is the id of the recorder that sent the
+         message (or, for recorders of earlier versions, the index of the port it was received from), or None if the
+         timeout expired. Values recorded with `record_many` are unpacked one by one.
+        """
+        self.connect()
+        while not self._pending:
+            if len(self.sockets) == 1 and timeout is None:
+                ready = [0]
+            else:
+                events = dict(await self.poller.poll(timeout))
+                ready = [index for index, socket in enumerate(self.sockets) if socket in events]
+                if not ready:
+                    return None
+            # One message from each ready socket in turn, so that the backlog of one source cannot starve the others
+            for index in ready:
+                frames = await self.sockets[index].recv_multipart()
+                for item in self._decode(index, frames):
+                    self._opened(item[0], item[1])
+                    self._pending.append(item)
+            if not self._pending and timeout is not None:
+                return None
+        return self._pending.popleft()
+
+    def _decode(self, index, frames):
+        if messages.is_row(frames):
+            return self.rows.decode(frames)
+        recorder_id, var_name, var_value = messages.decode(frames)
+        return [(index if recorder_id is None else recorder_id, var_name, var_value)]
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        """
+        Yields `(var_name, var_value)` tuples until the variables of all the recorders that sent anything have been
+        closed
+        """
+        while self._open or not self._seen:
+            source, var_name, var_value = await self.recv_from()
+            if messages.is_sentinel(var_value):
+                self._closed(source, var_name)
+                continue
+            return var_name, var_value
+        raise StopAsyncIteration
+
+    async def pump(self, out_queue, poll_interval=0.05):
+        """
+        Coroutine that receives messages continuously and puts the decoded `(source, var_name, var_value)` tuples into
+        `out_queue`. When `out_queue` is full, receiving pauses until the consumer catches up, and new messages
+        pile up in (and are eventually dropped by) the ZMQ sockets instead.
+
+        The SENTINEL is put into the queue too. Since more recorders may connect at any time, the coroutine only
+        returns once :meth:`.stop` has been called.
+
+        :param queue.Queue out_queue: The (bounded) queue to hand the values over to the consumer
+        :param float poll_interval: How often (in seconds) to check whether :meth:`.stop` has been called
+        """
+        self.connect()
+        timeout = int(poll_interval * 1000)
+        while not self._stop.is_set():
+            item = await self.recv_from(timeout)
+            if item is None:
+                continue
+            while not self._stop.is_set():
+                try:
+                    out_queue.put_nowait(item)
+                    break
+                except queue.Full:
+                    await asyncio.sleep(poll_interval)
+            if messages.is_sentinel(item[2]):
+                self._closed(item[0], item[1])
+        for socket in self.sockets:
+            socket.close(linger=0)
+        self.sockets = []
+
+    def stop(self):
+        """
+        Makes a running :meth:`.pump` return. Can be called from any thread.
+        """
+        self._stop.set()
+
+    def _opened(self, source, var_name):
+        if (source, var_name) not in self._seen:
+            self._seen.add((source, var_name))
+            self._open.add((source, var_name))
+
+    def _closed(self, source, var_name):
+        slogger.debug("Topic %s of source %r was closed", var_name, source)
+        self._open.discard((source, var_name))
+
+
+class SubscriberThread(threading.Thread):
+    """
+    Runs :meth:`.AsyncSubscriber.pump` in an event loop of its own in a background (daemon) thread, so that
+    receiving and decoding are decoupled from the consumer, e.g. from the timer of a matplotlib GUI.
+
+    :param AsyncSubscriber subscriber: The subscriber to run
+    :param int maxsize: Maximum number of decoded values that are buffered in :attr:`queue`
+    """
+
+    def __init__(self, subscriber, maxsize=1000):
+        super(SubscriberThread, self).__init__(name='%s-subscriber' % threading.current_thread().name)
+        self.daemon = True
+        self.subscriber = subscriber
+        self.queue = queue.Queue(maxsize=maxsize)
+
+    def run(self):
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self.subscriber.pump(self.queue))
+        finally:
+            loop.close()
+
+    def stop(self):
+        """
+        Stops receiving and waits for the thread to finish
+        """
+        self.subscriber.stop()
+        if self.is_alive():
+            self.join()
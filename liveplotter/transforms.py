@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+
+# This file is part of live-plotter.
+#
+# live-plotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# live-plotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with live-plotter.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For more information see: https://github.com/anandtrex/live-plotter
+
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+
+standard_library.install_aliases()
+from builtins import object
+
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class Transform(object):
+    """
+    Base class of the streaming transforms that derive extra series from a recorded variable on the subscriber side
+    (see the `transforms` argument of :class:`~liveplotter.plotter.PlotterBase`).
+
+    A transform is called with each batch of values received between two frames, and keeps only as much state as
+    it needs to continue with the next batch (O(window)). Values can be scalars or vectors, in which case the
+    transform is applied to each element independently.
+
+    Subclasses implement :meth:`.__call__`.
+    """
+
+    #: 'line' for transforms that produce one value per input value (or fewer), 'image' for transforms that produce a
+    #: vector per output step, like a spectrogram
+    kind = 'line'
+
+    def __call__(self, xs, values):
+        """
+        Transforms a batch of values.
+
+        :param xs: 1-D array with the x value of each value
+        :param values: Array with the values along the first axis
+        :return: A tuple `(xs, values)` with the transformed series, which can be shorter than the input
+        """
+        raise NotImplementedError()
+
+
+class _WindowTransform(Transform):
+    """
+    Base class of transforms over a sliding window of the last `window` values. The state is the last `window - 1`
+    values, padded with NaNs at the beginning of the stream.
+    """
+
+    def __init__(self, window=10):
+        assert window > 0, "window should be positive"
+        self.window = window
+        self.tail = None
+
+    def _windows(self, values):
+        if self.tail is None:
+            self.tail = np.full((self.window - 1,) + values.shape[1:], np.nan)
+        padded = np.concatenate([self.tail, values])
+        self.tail = padded[len(padded) - self.window + 1:]
+        # Shape (n_values,) + value shape + (window,)
+        return sliding_window_view(padded, self.window, axis=0)
+
+
+class MovingMean(_WindowTransform):
+    """
+    Mean of the last `window` values
+
+    :param int window: Number of values to average over
+    """
+
+    def __call__(self, xs, values):
+        return xs, np.nanmean(self._windows(values), axis=-1)
+
+
+class MovingMedian(_WindowTransform):
+    """
+    Median of the last `window` values
+
+    :param int window: Number of values to take the median of
+    """
+
+    def __call__(self, xs, values):
+        return xs, np.nanmedian(self._windows(values), axis=-1)
+
+
+class EMA(Transform):
+    """
+    Exponential moving average: `y[t] = (1 - alpha) * y[t - 1] + alpha * x[t]`, starting with the first value.
+
+    :param float alpha: Weight (0 < alpha <= 1) of the newest value
+    """
+
+    def __init__(self, alpha=0.1):
+        assert 0 < alpha <= 1, "alpha should be in (0, 1]"
+        self.alpha = alpha
+        self.last = None
+        # Batches are processed in chunks short enough that the decay factors don't underflow
+        self.chunk_size = max(1, int(-100. / math.log10(1. - alpha))) if alpha < 1 else None
+
+    def __call__(self, xs, values):
+        if len(values) == 0:
+            return xs, values
+        if self.alpha == 1:
+            # Only the newest value has any weight (and the chunked computation below would divide by zero)
+            self.last = values[-1]
+            return xs, values
+        if self.last is None:
+            self.last = values[0]
+        outputs = []
+        for start in range(0, len(values), self.chunk_size):
+            outputs.append(self._chunk(values[start:start + self.chunk_size]))
+        return xs, np.concatenate(outputs)
+
+    def _chunk(self, values):
+        # y[i] = d^(i+1) * y[-1] + alpha * sum_{j<=i} d^(i-j) * x[j], with d = 1 - alpha
+        decay = (1. - self.alpha) ** np.arange(1, len(values) + 1)
+        decay = decay.reshape((-1,) + (1,) * (values.ndim - 1))
+        outputs = decay * (self.last + self.alpha * np.cumsum(values / decay, axis=0))
+        self.last = outputs[-1]
+        return outputs
+
+
+class Rate(Transform):
+    """
+    Rate of change `(value[t] - value[t - 1]) / (x[t] - x[t - 1])`. There is no output for the very first value, nor
+    for values with the same x as the one before.
+    """
+
+    def __init__(self):
+        self.last_x = None
+        self.last_value = None
+
+    def __call__(self, xs, values):
+        if len(values) == 0:
+            return xs, values
+        if self.last_x is None:
+            all_xs, all_values = xs, values
+        else:
+            all_xs = np.concatenate([[self.last_x], xs])
+            all_values = np.concatenate([self.last_value[np.newaxis], values])
+        self.last_x, self.last_value = xs[-1], values[-1]
+        dx = np.diff(all_xs)
+        valid = dx != 0
+        dx = dx[valid].reshape((-1,) + (1,) * (values.ndim - 1))
+        return all_xs[1:][valid], np.diff(all_values, axis=0)[valid] / dx
+
+
+class CumSum(Transform):
+    """
+    Cumulative sum of all values so far
+    """
+
+    def __init__(self):
+        self.total = 0.
+
+    def __call__(self, xs, values):
+        if len(values) == 0:
+            return xs, values
+        sums = self.total + np.cumsum(values, axis=0)
+        self.total = sums[-1]
+        return xs, sums
+
+
+class Spectrogram(Transform):
+    """
+    Incremental short-time Fourier transform of a scalar signal, for watching oscillations. Every `hop` values, the
+    log power spectrum (in dB) of the last `nfft` values (weighted with a Hann window) is produced, at the x value of
+    the last of them.
+
+    :param int nfft: Number of values per spectrum
+    :param int hop: Number of values between two spectra. Defaults to `nfft // 2`
+    """
+
+    kind = 'image'
+
+    def __init__(self, nfft=128, hop=None):
+        self.nfft = nfft
+        self.hop = hop or max(1, nfft // 2)
+        self.window = np.hanning(nfft)
+        self.tail_xs = np.zeros(0)
+        self.tail = np.zeros(0)
+
+    def __call__(self, xs, values):
+        assert values.ndim == 1, "The spectrogram can only be computed for a scalar variable"
+        all_xs = np.concatenate([self.tail_xs, xs])
+        all_values = np.concatenate([self.tail, values])
+        n_frames = (len(all_values) - self.nfft) // self.hop + 1 if len(all_values) >= self.nfft else 0
+
+        # Keep what is needed for the next spectrum
+        self.tail_xs = all_xs[n_frames * self.hop:]
+        self.tail = all_values[n_frames * self.hop:]
+        if n_frames == 0:
+            return np.zeros(0), np.zeros((0, self.nfft // 2 + 1))
+
+        frames = sliding_window_view(all_values, self.nfft)[::self.hop][:n_frames]
+        power = np.abs(np.fft.rfft(frames * self.window, axis=1)) ** 2
+        frame_xs = all_xs[np.arange(n_frames) * self.hop + self.nfft - 1]
+        return frame_xs, 10. * np.log10(power + 1e-12)
+
+
+#: The transforms that can be given by name
+TRANSFORMS = {
+    'mean': MovingMean,
+    'median': MovingMedian,
+    'ema': EMA,
+    'rate': Rate,
+    'cumsum': CumSum,
+    'spectrogram': Spectrogram,
+}
+
+
+def make_transform(spec):
+    """
+    Creates a transform from its specification.
+
+    :param spec: A :class:`.Transform` instance, the name of one of the :data:`.TRANSFORMS` (e.g. `'ema'`), or a
+     tuple `(name, kwargs)`, e.g. `('ema', {'alpha': 0.01})`
+    :return: A :class:`.Transform`
+    """
+    if isinstance(spec, Transform):
+        return spec
+    if isinstance(spec, tuple):
+        name, kwargs = spec
+    else:
+        name, kwargs = spec, {}
+    if name not in TRANSFORMS:
+        raise ValueError("Unknown transform {}. Available transforms are {}".format(name, sorted(TRANSFORMS)))
+    return TRANSFORMS[name](**kwargs)
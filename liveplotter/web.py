@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+
+# This file is part of live-plotter.
+#
+# live-plotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# live-plotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with live-plotter.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For more information see: https://github.com/anandtrex/live-plotter
+
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import numbers
+import os
+import struct
+from multiprocessing import Process, Event, current_process
+from timeit import default_timer
+
+import numpy as np
+
+from liveplotter import PORT
+from liveplotter import messages
+from liveplotter.buffers import RingBuffer, decimate
+from liveplotter.scheduler import FrameScheduler
+from liveplotter.subscriber import AsyncSubscriber
+
+wlogger = logging.getLogger('liveplotter.web')
+
+WEBSOCKET_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC11B9A'
+CLIENT_HTML = os.path.join(os.path.dirname(__file__), 'web', 'index.html')
+
+
+class Series(object):
+    """
+    The history of one recorded variable on the subscriber side of the :class:`.WebPlotter`, and its binary encoding
+    for the browser client.
+
+    Scalars and vectors (optionally with an x value, as for :class:`~liveplotter.plotter_impls.GeneralPlotter` and
+    :class:`~liveplotter.plotter_impls.GeneralArrayPlotter`) are kept in a :class:`~liveplotter.buffers.RingBuffer`
+    and sent decimated. For 2-D arrays (images) only the latest one is kept.
+
+    :param var_name: Name of the variable
+    :param int history: Maximum number of values kept
+    :param int max_points: Approximate maximum number of points sent for each line
+    """
+
+    def __init__(self, var_name, history, max_points):
+        self.var_name = var_name
+        self.history = history
+        self.max_points = max_points
+        self.buffer = None
+        self.image = None
+        self.closed = False
+        self.updated = False
+
+    def add(self, data):
+        """
+        Adds a received value.
+
+        :param data: The value, or a tuple `(value, x)`. x can also be a date, which is sent as (fractional) days like
+         matplotlib does.
+        """
+        if isinstance(data, tuple) and len(data) == 2:
+            var, x = data
+        else:
+            var, x = data, None
+        var = np.asarray(var, dtype=np.float64)
+        if x is not None and not isinstance(x, numbers.Real):
+            from matplotlib.dates import date2num
+            x = date2num(x)
+
+        if var.ndim == 2:
+            self.image = var
+        else:
+            if self.buffer is None:
+                self.buffer = RingBuffer(self.history, shape=(1 + var.size,))
+            elif var.size != self.buffer.data.shape[1] - 1:
+                raise ValueError("{} has {} values instead of {}".format(self.var_name, var.size,
+                                                                         self.buffer.data.shape[1] - 1))
+            row = np.empty(1 + var.size)
+            row[0] = self.buffer.total if x is None else x
+            row[1:] = var.ravel()
+            self.buffer.append(row)
+        self.updated = True
+
+    def encode(self):
+        """
+        Encodes the current state for the browser client: a little-endian uint32 with the length of a JSON header,
+        the header (padded with spaces to a multiple of 8 bytes) and the binary payload described in the header.
+
+        :return: The encoded bytes
+        """
+        header = {'name': self.var_name, 'closed': self.closed}
+        if self.image is not None:
+            lo, hi = float(self.image.min()), float(self.image.max())
+            scaled = (self.image - lo) * (255. / (hi - lo) if hi > lo else 0.)
+            payload = scaled.astype(np.uint8)
+            header.update(kind='image', shape=list(payload.shape), min=lo, max=hi)
+        else:
+            rows = self.buffer.view()
+            rows = rows[decimate(rows[:, 1:], self.max_points)]
+            # x as float64 followed by all the lines as float32, column by column
+            payload = rows[:, 0].tobytes() + np.ascontiguousarray(rows[:, 1:].T, dtype=np.float32).tobytes()
+            header.update(kind='series', n_points=len(rows), n_lines=rows.shape[1] - 1)
+        header = json.dumps(header).encode('utf-8')
+        header += b' ' * (-(4 + len(header)) % 8)
+        return struct.pack('<I', len(header)) + header + bytes(payload)
+
+
+class WebPlotter(Process):
+    """
+    This is a ZMQ subscriber that forwards the recorded variables to web browsers instead of plotting them with
+    matplotlib. It runs a small HTTP server that serves a client page, which receives decimated, binary encoded
+    series and images over a WebSocket and draws them on HTML canvases. All viewers share the same encoded frames, so
+    adding viewers costs no extra work in Python.
+
+    Start it like the other plotters, e.g. `WebPlotter(['loss', 'weights']).start()`, and open
+    `http://localhost:8000` in a browser.
+
+    :param var_names: The name, or a list of names, of the variables to forward
+    :param port: The port number to subscribe to data, or a full ZMQ endpoint. See
+     :class:`~liveplotter.subscriber.AsyncSubscriber`
+    :param bool bind: Whether to connect to the recorder (the default), or to bind to the endpoint and let the
+     recorders connect
+    :param str host: The address the HTTP server listens on. Use '0.0.0.0' to allow viewers from other hosts.
+    :param int http_port: The port the HTTP server listens on
+    :param int history: Maximum number of values kept for each variable
+    :param int max_points: Approximate maximum number of points sent for each line
+    :param float fps: Target number of updates sent per second
+    :param float cpu_budget: Maximum fraction of the time to spend on encoding updates. See
+     :class:`~liveplotter.scheduler.FrameScheduler`.
+    """
+
+    def __init__(self, var_names, port=PORT, host='127.0.0.1', http_port=8000, history=100000, max_points=2000,
+                 fps=10., cpu_budget=0.5, bind=False):
+        super(WebPlotter, self).__init__()
+
+        if not isinstance(var_names, (list, tuple)):
+            var_names = [var_names]
+        self.var_names = list(var_names)
+        self.port = port
+        self.bind = bind
+        self.host = host
+        self.http_port = http_port
+        self.history = history
+        self.max_points = max_points
+        self.scheduler = FrameScheduler(fps=fps, cpu_budget=cpu_budget)
+        self._exit = Event()
+
+    def run(self):
+        """
+        Entry point when started as a separate process.
+        """
+        wlogger.info("Starting new process %s", current_process().name)
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self.serve())
+        finally:
+            loop.close()
+
+    def stop(self):
+        """
+        Makes the server stop. Can be called from any process.
+        """
+        self._exit.set()
+
+    async def serve(self):
+        """
+        Coroutine that receives the recorded values and serves the viewers until :meth:`.stop` is called
+        """
+        self.series = dict((var_name, Series(var_name, self.history, self.max_points)) for var_name in self.var_names)
+        self.clients = set()
+        self.handlers = set()
+        subscriber = AsyncSubscriber(self.var_names, port=self.port, bind=self.bind)
+        server = await asyncio.start_server(self._handle_connection, self.host, self.http_port)
+        wlogger.info("Serving %s on http://%s:%d", self.var_names, self.host, self.http_port)
+
+        receiving = asyncio.ensure_future(self._receive(subscriber))
+        receiving.add_done_callback(self._receiving_done)
+        try:
+            while not self._exit.is_set():
+                await asyncio.sleep(self.scheduler.interval)
+                start = default_timer()
+                if self._broadcast():
+                    self.scheduler.frame_done(default_timer() - start)
+        finally:
+            server.close()
+            for writer in list(self.clients):
+                writer.close()
+            receiving.cancel()
+            # Closing the connections makes the viewer handlers return
+            await asyncio.gather(receiving, *self.handlers, return_exceptions=True)
+
+    async def _receive(self, subscriber):
+        while True:
+            source, var_name, var_value = await subscriber.recv_from()
+            series = self.series[var_name]
+            if messages.is_sentinel(var_value):
+                series.closed = True
+                series.updated = True
+                continue
+            try:
+                series.add(var_value)
+            except Exception:
+                wlogger.exception("Dropped a value of %s that cannot be plotted", var_name)
+
+    @staticmethod
+    def _receiving_done(receiving):
+        if not receiving.cancelled() and receiving.exception() is not None:
+            wlogger.error("Stopped receiving values", exc_info=receiving.exception())
+
+    def _broadcast(self):
+        updated = [series for series in self.series.values()
+                   if series.updated and (series.buffer is not None or series.image is not None)]
+        if not updated or not self.clients:
+            return False
+        frames = [websocket_frame(series.encode()) for series in updated]
+        for series in updated:
+            series.updated = False
+        for writer in list(self.clients):
+            # Viewers that can't keep up skip frames instead of making the server buffer them
+            if writer.transport.get_write_buffer_size() > 4 * sum(len(frame) for frame in frames):
+                continue
+            for frame in frames:
+                writer.write(frame)
+        return True
+
+    async def _handle_connection(self, reader, writer):
+        self.handlers.add(asyncio.current_task())
+        try:
+            await self._handle_request(reader, writer)
+        finally:
+            self.handlers.discard(asyncio.current_task())
+
+    async def _handle_request(self, reader, writer):
+        try:
+            request = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+        lines = request.decode('latin-1').split('\r\n')
+        path = lines[0].split(' ')[1] if len(lines[0].split(' ')) > 1 else '/'
+        headers = dict((key.strip().lower(), value.strip())
+                       for key, _, value in (line.partition(':') for line in lines[1:] if line))
+
+        if path == '/ws' and headers.get('upgrade', '').lower() == 'websocket':
+            await self._handle_websocket(reader, writer, headers)
+        elif path in ('/', '/index.html'):
+            with open(CLIENT_HTML, 'rb') as f:
+                body = f.read()
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n'
+                         b'Content-Length: %d\r\nConnection: close\r\n\r\n' % len(body) + body)
+            await writer.drain()
+            writer.close()
+        else:
+            writer.write(b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+            await writer.drain()
+            writer.close()
+
+    async def _handle_websocket(self, reader, writer, headers):
+        accept = base64.b64encode(hashlib.sha1(headers['sec-websocket-key'].encode('ascii') + WEBSOCKET_GUID).digest())
+        writer.write(b'HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                     b'Sec-WebSocket-Accept: ' + accept + b'\r\n\r\n')
+        # New viewers get the current state of all variables
+        for series in self.series.values():
+            if series.buffer is not None or series.image is not None:
+                writer.write(websocket_frame(series.encode()))
+        self.clients.add(writer)
+        wlogger.info("Viewer connected, %d in total", len(self.clients))
+        try:
+            # The client doesn't send anything but control frames, so only wait for it to close the connection
+            while True:
+                opcode = await read_websocket_frame(reader)
+                if opcode == 0x8:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+            wlogger.info("Viewer disconnected, %d in total", len(self.clients))
+
+
+def websocket_frame(payload):
+    """
+    :return: `payload` wrapped in a single (unmasked, as sent by servers) binary WebSocket frame
+    """
+    n_bytes = len(payload)
+    if n_bytes < 126:
+        header = struct.pack('!BB', 0x82, n_bytes)
+    elif n_bytes < 1 << 16:
+        header = struct.pack('!BBH', 0x82, 126, n_bytes)
+    else:
+        header = struct.pack('!BBQ', 0x82, 127, n_bytes)
+    return header + payload
+
+
+async def read_websocket_frame(reader):
+    """
+    Reads (and discards) one WebSocket frame sent by a client
+
+    :return: The opcode of the frame
+    """
+    first, second = await reader.readexactly(2)
+    n_bytes = second & 0x7f
+    if n_bytes == 126:
+        n_bytes, = struct.unpack('!H', await reader.readexactly(2))
+    elif n_bytes == 127:
+        n_bytes, = struct.unpack('!Q', await reader.readexactly(8))
+    if second & 0x80:
+        n_bytes += 4  # Masking key
+    await reader.readexactly(n_bytes)
+    return first & 0x0f
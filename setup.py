@@ -27,8 +27,9 @@ def get_requirements(filename):
 requirements, dependency_links = get_requirements('requirements.txt')
 setup(
     name="Live Plotter",
-    version="1.0.0",
+    version="2.0.0",
     packages=['liveplotter'],
+    package_data={'liveplotter': ['web/*.html']},
     author="Anand Subramoney",
     author_email="anand@igi.tugraz.at",
     description="This module provides the library to do live plotting with matplotlib",
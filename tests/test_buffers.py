@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+# This file is part of live-plotter.
+#
+# live-plotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# live-plotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with live-plotter.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For more information see: https://github.com/anandtrex/live-plotter
+
+import numpy as np
+
+from liveplotter.buffers import RingBuffer, decimate, x_dtype
+
+
+def test_ring_buffer_wraps_around():
+    buffer = RingBuffer(5)
+    for value in range(3):
+        buffer.append(value)
+    np.testing.assert_array_equal(buffer.view(), [0, 1, 2])
+    for value in range(3, 12):
+        buffer.append(value)
+    np.testing.assert_array_equal(buffer.view(), [7, 8, 9, 10, 11])
+    assert len(buffer) == 5 and buffer.total == 12
+
+
+def test_ring_buffer_extend_matches_append():
+    appended, extended = RingBuffer(7, shape=(2,)), RingBuffer(7, shape=(2,))
+    values = np.arange(60.).reshape(30, 2)
+    start = 0
+    for size in [1, 3, 2, 9, 1, 14]:
+        for value in values[start:start + size]:
+            appended.append(value)
+        extended.extend(values[start:start + size])
+        start += size
+        np.testing.assert_array_equal(extended.view(), appended.view())
+    assert extended.total == appended.total == 30
+
+
+def test_ring_buffer_view_is_read_only():
+    buffer = RingBuffer(3)
+    buffer.append(1.)
+    assert not buffer.view().flags.writeable
+
+
+def test_x_dtype():
+    assert x_dtype(3) == np.float64
+    assert x_dtype(np.float32(3)) == np.float64
+    assert x_dtype(np.datetime64('2020-01-01')).kind == 'M'
+
+
+def test_decimate_keeps_short_series():
+    np.testing.assert_array_equal(decimate(np.arange(10.), 20), np.arange(10))
+
+
+def test_decimate_keeps_extremes():
+    rng = np.random.RandomState(0)
+    ys = rng.randn(10007)
+    ys[1234], ys[8765] = 100., -100.
+    indices = decimate(ys, 500)
+    assert len(indices) <= 500
+    assert np.all(np.diff(indices) > 0)
+    assert {0, 1234, 8765, len(ys) - 1} <= set(indices)
+
+
+def test_decimate_columns():
+    ys = np.zeros((1000, 2))
+    ys[10, 0], ys[990, 1] = 1., -1.
+    indices = decimate(ys, 100)
+    assert len(indices) <= 100
+    assert {10, 990} <= set(indices)
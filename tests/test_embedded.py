@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+# This file is part of live-plotter.
+#
+# live-plotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# live-plotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with live-plotter.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For more information see: https://github.com/anandtrex/live-plotter
+
+import datetime
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import numpy as np
+
+from liveplotter.embedded import EmbeddedPlotRecorder
+from liveplotter.plotter_impls import GeneralPlotter, MultiRunPlotter, TrajectoryPlotter, _aggregate
+
+
+def test_record_many_python_scalars():
+    recorder = EmbeddedPlotRecorder()
+    plotter = recorder.add(GeneralPlotter('loss'))
+    recorder.record_many({'loss': 1.5})
+    recorder.record_many({'loss': 2}, x=3)
+    recorder.draw()
+    np.testing.assert_array_equal(plotter.xs.view(), [0., 3.])
+    np.testing.assert_array_equal(plotter.data.view(), [1.5, 2.])
+    plotter.plt.close(plotter.fig)
+
+
+def test_datetime_x():
+    recorder = EmbeddedPlotRecorder()
+    plotter = recorder.add(GeneralPlotter('loss', transforms={'smoothed': 'ema'}))
+    start = datetime.datetime(2020, 1, 1)
+    for i in range(3):
+        recorder.record('loss', (np.float64(i), start + datetime.timedelta(hours=i)))
+    recorder.draw()
+    assert plotter.xs.view()[-1] == start + datetime.timedelta(hours=2)
+    assert len(plotter.derived['smoothed'][0]) == 3
+    plotter.plt.close(plotter.fig)
+
+
+def test_record_many_datetime_x():
+    recorder = EmbeddedPlotRecorder()
+    plotter = recorder.add(GeneralPlotter('loss'))
+    x = datetime.datetime(2020, 1, 1)
+    recorder.record_many({'loss': 1.}, x=x)
+    recorder.draw()
+    assert plotter.xs.view()[-1] == x
+    np.testing.assert_array_equal(plotter.data.view(), [1.])
+    plotter.plt.close(plotter.fig)
+
+
+def test_trajectory_axes_follow_the_trail():
+    recorder = EmbeddedPlotRecorder()
+    plotter = recorder.add(TrajectoryPlotter('state', dims=3, history=10))
+    for i in range(100):
+        recorder.record('state', np.array([i, 2. * i, 3. * i]))
+    recorder.draw()
+    lower, upper = plotter.ax.get_xlim()
+    assert 89 < lower < 90 and 99 < upper < 100
+    plotter.plt.close(plotter.fig)
+
+
+def test_multi_run_aggregate():
+    xs = np.arange(11.)
+    series = [(xs, xs), (xs + 5, xs * 0), (xs, 2 * xs)]
+    grid, q1, median, q3 = _aggregate(series, 6)
+    np.testing.assert_array_equal(grid, np.linspace(5, 10, 6))
+    np.testing.assert_allclose(median, grid)
+    np.testing.assert_allclose(q1, grid / 2)
+    np.testing.assert_allclose(q3, 1.5 * grid)
+    assert _aggregate(series[:1], 6) is None
+    assert _aggregate([(xs, xs), (xs + 20, xs)], 6) is None
+
+
+def test_multi_run_labels_and_datetime_x():
+    recorder = EmbeddedPlotRecorder()
+    plotter = recorder.add(MultiRunPlotter('loss'))
+    start = datetime.datetime(2020, 1, 1)
+    for i in range(5):
+        for run in ['lr=0.1', 'lr=0.01']:
+            recorder.record('loss', (np.float64(i), start + datetime.timedelta(hours=i), run))
+    recorder.draw()
+    labels = [text.get_text() for text in plotter.ax.get_legend().get_texts()]
+    assert labels == ['median', 'lr=0.1', 'lr=0.01']
+    assert len(plotter.median_line.get_xdata()) == plotter.n_grid
+    plotter.plt.close(plotter.fig)
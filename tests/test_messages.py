@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+# This file is part of live-plotter.
+#
+# live-plotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# live-plotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with live-plotter.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For more information see: https://github.com/anandtrex/live-plotter
+
+import datetime
+
+import numpy as np
+import pytest
+
+from liveplotter import SENTINEL
+from liveplotter import messages
+
+
+def test_encode_decode():
+    recorder_id = messages.new_recorder_id()
+    frames = messages.encode('x', np.arange(3.), recorder_id)
+    decoded_id, var_name, var_value = messages.decode(frames)
+    assert decoded_id == recorder_id
+    assert var_name == 'x'
+    np.testing.assert_array_equal(var_value, np.arange(3.))
+
+
+def test_encode_decode_compressed():
+    recorder_id = messages.new_recorder_id()
+    value = np.zeros(1 << 14)
+    frames = messages.encode('x', value, recorder_id, messages.Compression(threshold=1024))
+    assert len(frames[2]) < value.nbytes
+    decoded_id, var_name, var_value = messages.decode(frames)
+    assert decoded_id == recorder_id
+    np.testing.assert_array_equal(var_value, value)
+
+
+def test_decode_without_header():
+    frames = [messages.encode_topic('x'), messages.encode('x', SENTINEL, messages.new_recorder_id())[2]]
+    recorder_id, var_name, var_value = messages.decode(frames)
+    assert recorder_id is None
+    assert messages.is_sentinel(var_value)
+
+
+def _decode_all(decoder, message_list):
+    return [item for frames in message_list for item in decoder.decode(frames)]
+
+
+def test_rows_round_trip():
+    encoder = messages.RowEncoder(messages.new_recorder_id())
+    decoder = messages.RowDecoder(['loss', 'acc'])
+    items = _decode_all(decoder, encoder.encode({'loss': 1, 'acc': 2, 'lr': 3}))
+    items += _decode_all(decoder, encoder.encode({'loss': 4, 'acc': 5}, x=10))
+    assert items == [(encoder.recorder_id, 'loss', 1.), (encoder.recorder_id, 'acc', 2.),
+                     (encoder.recorder_id, 'loss', (4., 10.)), (encoder.recorder_id, 'acc', (5., 10.))]
+
+
+def test_rows_of_two_encoders():
+    # Both encoders number their schemas from 0, but their rows must not be decoded with each other's schema
+    first = messages.RowEncoder(messages.new_recorder_id())
+    second = messages.RowEncoder(messages.new_recorder_id())
+    decoder = messages.RowDecoder(['loss', 'acc'])
+    first_messages = first.encode({'loss': 1, 'acc': 2})
+    second_messages = second.encode({'acc': 3, 'loss': 4})
+    items = _decode_all(decoder, first_messages[:1] + second_messages[:1] + first_messages[1:] + second_messages[1:])
+    assert sorted(items) == sorted([(first.recorder_id, 'loss', 1.), (first.recorder_id, 'acc', 2.),
+                                    (second.recorder_id, 'acc', 3.), (second.recorder_id, 'loss', 4.)])
+
+
+def test_row_with_unknown_schema_is_dropped():
+    encoder = messages.RowEncoder(messages.new_recorder_id())
+    decoder = messages.RowDecoder(['loss'])
+    row = encoder.encode({'loss': 1})[-1]
+    assert decoder.decode(row) == []
+
+
+def test_split_scalars_with_datetime_x():
+    var_dict = {'loss': 1., 'image': np.zeros((2, 2))}
+    scalars, others = messages.split_scalars(var_dict)
+    assert list(scalars) == ['loss'] and list(others) == ['image']
+    scalars, others = messages.split_scalars(var_dict, x=datetime.datetime(2020, 1, 1))
+    assert scalars == {} and list(others) == ['loss', 'image']
+    assert isinstance(others['loss'], np.float64)
+
+
+def test_row_with_datetime_x_is_refused():
+    encoder = messages.RowEncoder(messages.new_recorder_id())
+    with pytest.raises(AssertionError):
+        encoder.encode({'loss': 1.}, x=datetime.datetime(2020, 1, 1))
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+# This file is part of live-plotter.
+#
+# live-plotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# live-plotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with live-plotter.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For more information see: https://github.com/anandtrex/live-plotter
+
+import queue
+
+from liveplotter import SENTINEL
+from liveplotter.plotter import PlotterBase
+
+
+class _Recorder(PlotterBase):
+    """
+    Keeps the values it receives, and records another value each time, like a producer that is faster than drawing
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(_Recorder, self).__init__(*args, **kwargs)
+        self.queue = queue.Queue()
+        self.values = []
+        self.produce = True
+
+    def plot_loop(self, data, it):
+        self.values.append(data)
+        if self.produce:
+            self.queue.put((self.source, self.var_name, data + 100))
+
+
+def test_receive_stops_at_the_values_queued_before():
+    plotter = _Recorder('x')
+    for value in range(3):
+        plotter.queue.put((0, 'x', value))
+    assert plotter.receive() == 3
+    assert plotter.values == [0, 1, 2]
+    assert plotter.receive() == 3
+    assert plotter.values == [0, 1, 2, 100, 101, 102]
+
+
+def test_receive_stops_when_all_sources_are_closed():
+    plotter = _Recorder('x')
+    plotter.produce = False
+    for item in [(b'a', 'x', 1), (b'b', 'x', 2), (b'a', 'x', SENTINEL)]:
+        plotter.queue.put(item)
+    plotter.receive()
+    assert not plotter._exit.is_set()
+    plotter.queue.put((b'b', 'x', SENTINEL))
+    plotter.receive()
+    assert plotter._exit.is_set()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+# This file is part of live-plotter.
+#
+# live-plotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# live-plotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with live-plotter.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For more information see: https://github.com/anandtrex/live-plotter
+
+import pytest
+
+from liveplotter.scheduler import FrameScheduler
+
+
+def test_cheap_frames_run_at_fps():
+    scheduler = FrameScheduler(fps=10., cpu_budget=0.5)
+    assert scheduler.interval == pytest.approx(0.1)
+    for _ in range(10):
+        scheduler.frame_done(0.01)
+    assert scheduler.interval == pytest.approx(0.1)
+    assert scheduler.interval_ms == 100
+
+
+def test_expensive_frames_back_off_to_the_budget():
+    scheduler = FrameScheduler(fps=10., cpu_budget=0.5)
+    assert scheduler.frame_done(0.2) == pytest.approx(0.4)
+    assert scheduler.interval_ms == 400
+
+
+def test_backoff_is_bounded():
+    scheduler = FrameScheduler(fps=10., cpu_budget=0.5, max_interval=2.)
+    assert scheduler.frame_done(10.) == pytest.approx(2.)
+    # max_interval is never below the interval of the target fps
+    assert FrameScheduler(fps=0.1, max_interval=1.).max_interval == pytest.approx(10.)
+
+
+def test_frame_cost_is_smoothed():
+    scheduler = FrameScheduler(fps=100., cpu_budget=1., smoothing=0.5)
+    scheduler.frame_done(0.1)
+    # One slow frame moves the estimate half way
+    assert scheduler.frame_done(0.5) == pytest.approx(0.3)
+    # and it converges to a steady cost
+    for _ in range(50):
+        scheduler.frame_done(0.02)
+    assert scheduler.frame_cost == pytest.approx(0.02)
+    assert scheduler.interval == pytest.approx(0.02)
+
+
+def test_invalid_arguments():
+    with pytest.raises(AssertionError):
+        FrameScheduler(fps=0)
+    with pytest.raises(AssertionError):
+        FrameScheduler(cpu_budget=1.5)
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+# This file is part of live-plotter.
+#
+# live-plotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# live-plotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with live-plotter.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For more information see: https://github.com/anandtrex/live-plotter
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import pytest
+
+from liveplotter import soak
+from liveplotter.plotter_impls import GeneralPlotter, MultiRunPlotter
+
+
+def test_soak_smoke():
+    # 20 simulated seconds in about 2 seconds
+    result = soak.soak(GeneralPlotter, hours=20. / 3600, rate=100., speedup=10., n_samples=5, history=100,
+                       derived_history=100)
+    assert len(result.hours) >= 3
+    assert all(lag_ms < 5000 for lag_ms in result.lag_ms)
+    assert result.check(0.2, {'rss_mb': float('inf'), 'lag_ms': float('inf'), 'frame_ms': float('inf')})
+
+
+def test_soak_main_without_samples(capsys):
+    # Too short for a single sample: reported as a failure instead of crashing
+    assert soak.main(['--hours', '0', '--plotters', 'MultiRunPlotter']) == 1
+    assert 'no samples' in capsys.readouterr().out
+
+
+def test_every_plotter_has_a_stream():
+    assert set(cls.__name__ for cls in soak.plotter_classes()) <= set(soak.STREAMS)
+    assert MultiRunPlotter.__name__ in soak.STREAMS
+
+
+def test_check_ignores_outliers():
+    result = soak.SoakResult('test')
+    for i in range(50):
+        result.add_sample(i / 50., 100., 100., 300. if i in (30, 40) else 10.)
+    assert result.check(0.2, {'rss_mb': 1., 'lag_ms': 1., 'frame_ms': 1.})
+    result = soak.SoakResult('test')
+    for i in range(50):
+        result.add_sample(i / 50., 100. + 10. * i / 50., 100., 10.)
+    assert not result.check(0.2, {'rss_mb': 5., 'lag_ms': 1., 'frame_ms': 1.})
+    assert result.slopes['rss_mb'] == pytest.approx(10.)
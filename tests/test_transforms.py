@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+# This file is part of live-plotter.
+#
+# live-plotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# live-plotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with live-plotter.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For more information see: https://github.com/anandtrex/live-plotter
+
+import numpy as np
+import pytest
+
+from liveplotter import transforms
+
+# Uneven batch sizes, including single values, that add up to 1000
+BATCH_SIZES = [1, 1, 7, 1, 130, 3, 1, 400, 2, 1, 453]
+
+
+def _batched(transform, xs, values):
+    out_xs, out_values, start = [], [], 0
+    for size in BATCH_SIZES:
+        batch_xs, batch_values = transform(xs[start:start + size], values[start:start + size])
+        out_xs.append(batch_xs)
+        out_values.append(batch_values)
+        start += size
+    assert start == len(values)
+    return np.concatenate(out_xs), np.concatenate(out_values)
+
+
+def _moving(values, window, reduce):
+    return np.array([reduce(values[max(0, t - window + 1):t + 1], axis=0) for t in range(len(values))])
+
+
+def _ema(values, alpha):
+    outputs = [values[0]]
+    for value in values[1:]:
+        outputs.append((1 - alpha) * outputs[-1] + alpha * value)
+    return np.array(outputs)
+
+
+def _rate(xs, values):
+    keep = [t for t in range(1, len(xs)) if xs[t] != xs[t - 1]]
+    return xs[keep], np.array([(values[t] - values[t - 1]) / (xs[t] - xs[t - 1]) for t in keep])
+
+
+def _spectrogram(xs, values, nfft, hop):
+    starts = range(0, len(values) - nfft + 1, hop)
+    power = [np.abs(np.fft.rfft(values[s:s + nfft] * np.hanning(nfft))) ** 2 for s in starts]
+    return xs[[s + nfft - 1 for s in starts]], 10. * np.log10(np.array(power) + 1e-12)
+
+
+@pytest.fixture(params=[(), (3,)], ids=['scalar', 'vector'])
+def stream(request):
+    rng = np.random.RandomState(0)
+    xs = np.cumsum(rng.randint(0, 3, size=1000)).astype(np.float64)
+    return xs, rng.randn(1000, *request.param)
+
+
+@pytest.mark.parametrize('window', [1, 5, 50])
+def test_moving_mean(stream, window):
+    xs, values = stream
+    out_xs, out_values = _batched(transforms.MovingMean(window), xs, values)
+    np.testing.assert_array_equal(out_xs, xs)
+    np.testing.assert_allclose(out_values, _moving(values, window, np.mean))
+
+
+@pytest.mark.parametrize('window', [1, 4, 25])
+def test_moving_median(stream, window):
+    xs, values = stream
+    out_xs, out_values = _batched(transforms.MovingMedian(window), xs, values)
+    np.testing.assert_allclose(out_values, _moving(values, window, np.median))
+
+
+@pytest.mark.parametrize('alpha', [0.001, 0.1, 0.5, 1.])
+def test_ema(stream, alpha):
+    xs, values = stream
+    out_xs, out_values = _batched(transforms.EMA(alpha), xs, values)
+    np.testing.assert_array_equal(out_xs, xs)
+    np.testing.assert_allclose(out_values, _ema(values, alpha), rtol=1e-9, atol=1e-12)
+
+
+def test_rate(stream):
+    xs, values = stream
+    out_xs, out_values = _batched(transforms.Rate(), xs, values)
+    ref_xs, ref_values = _rate(xs, values)
+    np.testing.assert_array_equal(out_xs, ref_xs)
+    np.testing.assert_allclose(out_values, ref_values)
+    assert np.all(np.isfinite(out_values))
+
+
+def test_cumsum(stream):
+    xs, values = stream
+    out_xs, out_values = _batched(transforms.CumSum(), xs, values)
+    np.testing.assert_allclose(out_values, np.cumsum(values, axis=0))
+
+
+@pytest.mark.parametrize('nfft, hop', [(64, None), (16, 5), (8, 8)])
+def test_spectrogram(nfft, hop):
+    rng = np.random.RandomState(0)
+    xs, values = np.arange(1000.), rng.randn(1000)
+    transform = transforms.Spectrogram(nfft, hop)
+    out_xs, out_values = _batched(transform, xs, values)
+    ref_xs, ref_values = _spectrogram(xs, values, nfft, transform.hop)
+    np.testing.assert_array_equal(out_xs, ref_xs)
+    np.testing.assert_allclose(out_values, ref_values, atol=1e-9)
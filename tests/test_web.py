@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+# This file is part of live-plotter.
+#
+# live-plotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# live-plotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with live-plotter.  If not, see <http://www.gnu.org/licenses/>.
+#
+# For more information see: https://github.com/anandtrex/live-plotter
+
+import datetime
+
+import numpy as np
+import pytest
+
+from liveplotter.web import Series
+
+
+def test_series_with_datetime_x():
+    series = Series('loss', history=10, max_points=100)
+    series.add((1., datetime.datetime(2020, 1, 1)))
+    series.add((2., datetime.datetime(2020, 1, 2)))
+    rows = series.buffer.view()
+    assert rows[1, 0] - rows[0, 0] == 1.
+    np.testing.assert_array_equal(rows[:, 1], [1., 2.])
+
+
+def test_series_rejects_vector_of_other_length():
+    series = Series('weights', history=10, max_points=100)
+    series.add(np.zeros(3))
+    with pytest.raises(ValueError):
+        series.add(np.zeros(4))
+    assert len(series.buffer) == 1